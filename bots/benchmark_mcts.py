@@ -0,0 +1,52 @@
+import random
+import time
+
+from bots.benchmark_minimax import benchmark_positions
+from bots.mcts_agent import MCTSAgent
+from bots.minimax_agent import MiniMaxAI
+from connect_4_game import Connect4Game
+
+
+def measure_throughput(agent, positions):
+    """Runs one search per position and returns (playouts, tree nodes, seconds)."""
+    playouts = nodes = 0
+    random.seed(0)
+    start = time.perf_counter()
+    for game in positions:
+        agent.reset()
+        agent.get_move(game)
+        playouts += agent.last_playouts
+        nodes += agent.last_tree_size
+    return playouts, nodes, time.perf_counter() - start
+
+
+def reused_playouts(agent, opponent, seed=0):
+    """Plays one game and returns the share of each move's tree that came from earlier turns."""
+    random.seed(seed)
+    game = Connect4Game()
+    agents = (agent, opponent)
+    reused = []
+    while not game.game_over:
+        current = agents[game.turn]
+        if current is agent:
+            root = agent.find_root(game)
+            before = root.visits
+            game.drop_piece(agent.get_move(game))
+            reused.append(before / (before + agent.last_playouts))
+        else:
+            game.drop_piece(current.get_move(game))
+    return reused
+
+
+if __name__ == "__main__":
+    positions = benchmark_positions()
+
+    print("Playout throughput")
+    for budget in (500, 2000):
+        playouts, nodes, elapsed = measure_throughput(MCTSAgent('●', playouts=budget), positions)
+        print(f"{budget:>6} playouts/move: {playouts / elapsed:,.0f} playouts/s, "
+              f"{nodes / len(positions):,.0f} tree nodes/move")
+
+    print("\nTree reuse against a depth-2 minimax opponent")
+    reused = reused_playouts(MCTSAgent('●', playouts=2000), MiniMaxAI('○', depth=2))
+    print(f"{len(reused)} moves, {sum(reused) / len(reused):.0%} of each move's visits carried over on average")
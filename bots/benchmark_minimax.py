@@ -0,0 +1,132 @@
+import os
+import random
+import sys
+import time
+
+from bots.minimax_agent import MiniMaxAI
+from connect_4_game import Connect4Game, PIECES
+
+
+class CopyingMiniMaxAI(MiniMaxAI):
+    """The same search, but every child position is a copy of the game, as before make/unmake."""
+
+    def make_move(self, game, col, player):
+        self.evaluator.add(player, game.heights[col])
+        child = game.copy()
+        child.drop_piece(col, PIECES[player])
+        return child
+
+    def unmake_move(self, game, col, player):
+        self.evaluator.remove(player, game.heights[col])  # The move was only played on the copy
+
+
+def counting_allocations(agent_class):
+    """Subclass of agent_class that counts the memory blocks every make_move leaves allocated."""
+
+    class AllocationCounting(agent_class):
+        child_blocks = 0
+
+        def make_move(self, game, col, player):
+            before = sys.getallocatedblocks()
+            child = super().make_move(game, col, player)
+            self.child_blocks += sys.getallocatedblocks() - before
+            return child
+
+    return AllocationCounting
+
+
+def benchmark_positions(num_positions=20, seed=0):
+    """Builds random midgame positions to search from."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = Connect4Game()
+        for _ in range(rng.randint(4, 12)):
+            game.drop_piece(rng.choice(game.get_valid_columns()))
+        if not game.game_over:
+            positions.append(game)
+    return positions
+
+
+def run_benchmark(agent, positions):
+    """Searches every position and returns (nodes, seconds)."""
+    nodes = 0
+    start = time.perf_counter()
+    for game in positions:
+        agent.reset()
+        agent.get_move(game)
+        nodes += agent.last_nodes_expanded
+    return nodes, time.perf_counter() - start
+
+
+def report(name, agent, positions):
+    nodes, elapsed = run_benchmark(agent, positions)
+    print(f"{name:>22}: {nodes} nodes, {elapsed / nodes * 1e6:.1f} us/node")
+    return nodes, elapsed
+
+
+def blocks_per_node(agent_class, positions, depth):
+    """Memory blocks allocated for each searched child position, counted in a separate run."""
+    agent = counting_allocations(agent_class)('●', depth=depth)
+    nodes, _ = run_benchmark(agent, positions)
+    return agent.child_blocks / nodes
+
+
+def report_make_unmake(positions, depth, runs=3):
+    """Copying against make/unmake on the same search, in time and in allocations per node.
+
+    Both sides take the best of several runs, since their difference per node is small next
+    to the run-to-run noise.
+    """
+    results = {}
+    for name, agent_class in (("copy per node", CopyingMiniMaxAI), ("make/unmake", MiniMaxAI)):
+        agent = agent_class('●', depth=depth)
+        nodes, elapsed = min((run_benchmark(agent, positions) for _ in range(runs)), key=lambda r: r[1])
+        print(f"{name:>22}: {nodes} nodes, {elapsed / nodes * 1e6:.1f} us/node (best of {runs})")
+        results[name] = nodes, elapsed
+    (copy_nodes, copy_time), (nodes, elapsed) = results.values()
+    if copy_nodes != nodes:
+        print(f"{'':>22}  DIFFERENT searches: {copy_nodes} against {nodes} nodes")
+    copy_blocks = blocks_per_node(CopyingMiniMaxAI, positions, depth)
+    blocks = blocks_per_node(MiniMaxAI, positions, depth)
+    # Make/unmake usually leaves nothing allocated, so compare against at least one block per 1000 nodes
+    print(f"{'allocations':>22}: {copy_blocks:.3f} against {blocks:.3f} blocks/node, "
+          f"{copy_blocks / max(blocks, 0.001):.0f}x fewer; "
+          f"{(copy_time / copy_nodes) / (elapsed / nodes):.2f}x faster per node")
+
+
+def timed_moves(agent, positions):
+    """Returns the (move, score) chosen for every position and the total search time."""
+    results = []
+    start = time.perf_counter()
+    for game in positions:
+        agent.reset()
+        results.append((agent.get_move(game), agent.last_score))
+    return results, time.perf_counter() - start
+
+
+def report_parallel(positions, depth, workers):
+    serial_results, serial_time = timed_moves(MiniMaxAI('●', depth=depth), positions)
+    parallel = MiniMaxAI('●', depth=depth, workers=workers)
+    timed_moves(parallel, positions[:1])  # Start the worker processes outside the timing
+    parallel_results, parallel_time = timed_moves(parallel, positions)
+    parallel.close()
+    print(f"{'1 worker':>22}: {serial_time:.2f}s")
+    print(f"{f'{workers} workers':>22}: {parallel_time:.2f}s, speedup {serial_time / parallel_time:.2f}x, "
+          f"{'identical' if parallel_results == serial_results else 'DIFFERENT'} moves and scores")
+
+
+if __name__ == "__main__":
+    depth = 5
+    positions = benchmark_positions()
+
+    print(f"Make/unmake against copying, depth {depth}")
+    report_make_unmake(positions, depth)
+
+    print(f"\nMove ordering, same evaluation, depth {depth + 2}")
+    report("natural order", MiniMaxAI('●', depth=depth + 2, move_ordering=False), positions)
+    report("center/killer/history", MiniMaxAI('●', depth=depth + 2), positions)
+
+    workers = max(2, os.cpu_count() or 1)
+    print(f"\nRoot-split parallel search, depth {depth + 2}")
+    report_parallel(positions, depth + 2, workers)
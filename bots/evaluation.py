@@ -0,0 +1,61 @@
+from connect_4_game import ROWS, COLS, H1
+
+# Every line of 4 cells on the board (69 in total), as bitboard indices
+WINDOWS = []
+for _c in range(COLS):
+    for _h in range(ROWS):
+        for _dc, _dh in ((0, 1), (1, 0), (1, 1), (1, -1)):  # Vertical, horizontal, diagonal /, diagonal \
+            if 0 <= _c + 3 * _dc < COLS and 0 <= _h + 3 * _dh < ROWS:
+                WINDOWS.append(tuple((_c + i * _dc) * H1 + _h + i * _dh for i in range(4)))
+
+# The windows passing through each cell, so a move only touches the windows it can change
+CELL_WINDOWS = [[] for _ in range(COLS * H1)]
+for _w, _window in enumerate(WINDOWS):
+    for _bit in _window:
+        CELL_WINDOWS[_bit].append(_w)
+
+# Value of a window holding n pieces of one player and none of the other: open twos and threes
+WINDOW_WEIGHTS = (0, 0, 2, 10, 0)
+
+
+class WindowEvaluator:
+    def __init__(self):
+        """Heuristic score kept up to date one move at a time, from Player 1's ('●') point of view."""
+        self.counts = ([0] * len(WINDOWS), [0] * len(WINDOWS))
+        self.score = 0
+
+    def reset(self, game):
+        """Rebuilds the window counts from the game's bitboards."""
+        self.counts = ([0] * len(WINDOWS), [0] * len(WINDOWS))
+        self.score = 0
+        for player in (0, 1):
+            bitboard = game.bitboards[player]
+            for w, window in enumerate(WINDOWS):
+                self.counts[player][w] = sum(bitboard >> bit & 1 for bit in window)
+        for w in range(len(WINDOWS)):
+            self.score += self.window_value(w)
+
+    def window_value(self, w):
+        """Score of one window; windows holding both colours can never be completed."""
+        own, other = self.counts[0][w], self.counts[1][w]
+        if other == 0:
+            return WINDOW_WEIGHTS[own]
+        if own == 0:
+            return -WINDOW_WEIGHTS[other]
+        return 0
+
+    def add(self, player, bit):
+        """Accounts for a piece of player (0 or 1) placed on the given bit."""
+        counts = self.counts[player]
+        for w in CELL_WINDOWS[bit]:
+            before = self.window_value(w)
+            counts[w] += 1
+            self.score += self.window_value(w) - before
+
+    def remove(self, player, bit):
+        """Reverts add() when the move is taken back."""
+        counts = self.counts[player]
+        for w in CELL_WINDOWS[bit]:
+            before = self.window_value(w)
+            counts[w] -= 1
+            self.score += self.window_value(w) - before
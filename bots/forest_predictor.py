@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+
+
+def node_dtype(n_classes):
+    """Layout of one tree node in the exported file."""
+    return np.dtype([
+        ("feature", np.int32),    # Feature tested at this node, -1 for a leaf
+        ("threshold", np.float64),  # Go left when x[feature] <= threshold
+        ("left", np.int32),       # Child indices are global, so all trees share one array
+        ("right", np.int32),
+        ("value", np.float32, (n_classes,)),  # Class probabilities at this node
+    ])
+
+
+class FlatForest:
+    def __init__(self, nodes, roots, classes, max_depth):
+        """Pure-NumPy decision forest over the flat node array written by ml_training.export_model."""
+        self.nodes = nodes
+        self.feature = nodes["feature"]
+        self.threshold = nodes["threshold"]
+        self.left = nodes["left"]
+        self.right = nodes["right"]
+        self.value = nodes["value"]
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.classes_ = np.asarray(classes)
+        self.max_depth = max_depth
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps the node array, so every process reading it shares one page-cached copy."""
+        with open(path[:-4] + ".json") as f:
+            meta = json.load(f)
+        nodes = np.load(path, mmap_mode="r")
+        return cls(nodes, meta["roots"], meta["classes"], meta["max_depth"])
+
+    def apply(self, X):
+        """Returns the leaf reached in every tree, shaped (n_samples, n_trees)."""
+        X = np.asarray(X)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            inner = feature >= 0
+            if not inner.any():
+                break
+            go_left = X[rows, np.where(inner, feature, 0)] <= self.threshold[node]
+            node = np.where(inner, np.where(go_left, self.left[node], self.right[node]), node)
+        return node
+
+    def predict_proba(self, X):
+        """Average of the trees' leaf probabilities, like RandomForestClassifier.predict_proba."""
+        return self.value[self.apply(X)].mean(axis=1, dtype=np.float64)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
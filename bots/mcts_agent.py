@@ -0,0 +1,153 @@
+import math
+import random
+import time
+from connect_4_game import Connect4Game, VALID_COLUMNS, PIECES
+
+
+class Node:
+    __slots__ = ("parent", "move", "player", "children", "untried", "visits", "wins")
+
+    def __init__(self, parent, move, player, untried):
+        self.parent = parent
+        self.move = move  # Column played to reach this node
+        self.player = player  # Index of the player who played that move
+        self.children = {}
+        self.untried = untried  # Columns not expanded yet
+        self.visits = 0
+        self.wins = 0.0  # From the point of view of self.player; draws count half
+
+
+class MCTSAgent:
+    def __init__(self, piece, playouts=2000, time_limit_ms=None, exploration=math.sqrt(2), reuse_tree=True):
+        """Monte Carlo Tree Search with UCT selection and random playouts.
+
+        Runs `playouts` iterations per move, or as many as fit in time_limit_ms when it is set.
+        With reuse_tree, the subtree under the moves actually played is kept for the next turn.
+        """
+        self.piece = piece  # '●' or '○'
+        self.player = PIECES.index(piece)
+        self.playouts = playouts
+        self.time_limit_ms = time_limit_ms
+        self.exploration = exploration
+        self.reuse_tree = reuse_tree
+        self.root = None
+        self._root_history = []
+        self._stop_requested = False  # Set from another thread by stop()
+        self.last_playouts = 0  # Read by PerformanceEvaluator
+        self.last_playouts_per_second = 0.0
+        self.last_tree_size = 0
+        self.last_search_depth = 0  # Deepest tree node reached this move
+        self.last_nodes_expanded = 0  # Nodes added to the tree this move
+
+    def reset(self):
+        """Drops the search tree."""
+        self.root = None
+        self._root_history = []
+        self._stop_requested = False
+
+    def stop(self):
+        """Asks a get_move running in another thread to return the best move found so far.
+
+        A request made before the search has started still counts; it is cleared when the
+        search finishes.
+        """
+        self._stop_requested = True
+
+    def find_root(self, game):
+        """Returns the stored node for the game's position, or a fresh root."""
+        history = game.history
+        if self.reuse_tree and self.root is not None and history[:len(self._root_history)] == self._root_history:
+            node = self.root
+            for col in history[len(self._root_history):]:
+                node = node.children.get(col)
+                if node is None:
+                    break
+            if node is not None:
+                node.parent = None  # Lets the rest of the old tree be freed
+                return node
+        return Node(None, None, 1 - game.turn, list(VALID_COLUMNS[game.full_columns]))
+
+    def select_child(self, node):
+        """UCT: the child with the best average result plus an exploration bonus."""
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best, best_value = None, -1.0
+        for child in node.children.values():
+            value = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def run_playout(self, game, root):
+        """One select, expand, simulate and backpropagate pass; the game is restored afterwards."""
+        node = root
+        result = True
+        played = 0
+        # Selection: walk down fully expanded nodes
+        while not node.untried and node.children:
+            node = self.select_child(node)
+            result = game.drop_piece(node.move)
+            played += 1
+        depth = played
+        # Expansion: add one child for an untried column
+        if node.untried and not game.game_over:
+            col = node.untried.pop(random.randrange(len(node.untried)))
+            player = game.turn
+            result = game.drop_piece(col)
+            played += 1
+            depth = played
+            child = Node(node, col, player, [] if game.game_over else list(VALID_COLUMNS[game.full_columns]))
+            node.children[col] = child
+            node = child
+            self.last_nodes_expanded += 1
+        # Simulation: random moves straight on the game, nothing allocated
+        while not game.game_over:
+            result = game.drop_piece(random.choice(VALID_COLUMNS[game.full_columns]))
+            played += 1
+        for _ in range(played):
+            game.undo_move()
+
+        # Backpropagation
+        winner = PIECES.index(result) if result in PIECES else None
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.player:
+                node.wins += 1.0
+            node = node.parent
+        return depth
+
+    def get_move(self, game: Connect4Game):
+        """Returns the most visited column after the search."""
+        root = self.find_root(game)
+        self.last_nodes_expanded = 0
+        self.last_search_depth = 0
+        start = time.perf_counter()
+        deadline = start + self.time_limit_ms / 1000 if self.time_limit_ms is not None else None
+        playouts = 0
+        while playouts < 1 or not self._stop_requested and (
+                playouts < self.playouts if deadline is None else time.perf_counter() < deadline):
+            depth = self.run_playout(game, root)
+            if depth > self.last_search_depth:
+                self.last_search_depth = depth
+            playouts += 1
+        elapsed = time.perf_counter() - start
+        self._stop_requested = False  # Cleared here, not on entry, so an early stop() is not lost
+
+        self.root = root
+        self._root_history = game.history[:]
+        self.last_playouts = playouts
+        self.last_playouts_per_second = playouts / elapsed if elapsed > 0 else 0.0
+        self.last_tree_size = self.tree_size(root)
+        return max(root.children.values(), key=lambda child: child.visits).move
+
+    @staticmethod
+    def tree_size(root):
+        size = 0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            size += 1
+            stack.extend(node.children.values())
+        return size
@@ -1,58 +1,354 @@
-import random
 import math
-from connect_4_game import Connect4Game
+import time
+from concurrent.futures import ProcessPoolExecutor
+from bots.evaluation import WindowEvaluator
+from bots.solver import Solver, endgame_move
+from bots.transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from connect_4_game import Connect4Game, ROWS, COLS, PIECES, mirror_column
+
+MINIMIZING_KEY = 0x9E3779B97F4A7C15  # Xor-ed into the hash at nodes where the opponent is to move
+WIN_SCORE = 10000
+TIME_CHECK_INTERVAL = 1024  # Nodes between clock checks in timed mode
+CENTER_DISTANCE = [abs(c - COLS // 2) for c in range(COLS)]
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the move's time budget has run out."""
+
+
+_worker_agent = None  # The search agent of a root-split worker process
+
+
+def _init_search_worker(piece, depth, tt_memory_mb, tt_replacement, move_ordering):
+    """Gives every worker process its own agent, transposition table included."""
+    global _worker_agent
+    _worker_agent = MiniMaxAI(piece, depth, tt_memory_mb, tt_replacement, move_ordering=move_ordering,
+                              solver_empty_cells=0)
+
+
+def _search_root_move(game, col, depth, alpha, deadline):
+    """Scores one root move in a worker; returns (score, nodes, cutoffs, tt probes, tt hits),
+    score None if time ran out."""
+    agent = _worker_agent
+    agent.tt.new_search()
+    agent.evaluator.reset(game)
+    agent.nodes = 0
+    agent.cutoffs = 0
+    probes, hits = agent.tt.probes, agent.tt.hits
+    agent._deadline = deadline
+    try:
+        score = agent.search_child(game, col, depth, alpha)
+    except SearchTimeout:
+        score = None
+    finally:
+        agent._deadline = None
+    return score, agent.nodes, agent.cutoffs, agent.tt.probes - probes, agent.tt.hits - hits
+
 
 class MiniMaxAI:
-    def __init__(self, piece, depth=6):
+    def __init__(self, piece, depth=6, tt_memory_mb=16, tt_replacement="depth", time_limit_ms=None,
+                 move_ordering=True, solver_empty_cells=16, workers=1):
+        """With time_limit_ms set, the search deepens one ply at a time until the budget runs out
+        instead of stopping at a fixed depth. Positions with at most solver_empty_cells empty
+        cells are played perfectly without searching.
+
+        With workers > 1, root moves after the first are searched in that many processes. The
+        chosen move and score at a fixed depth are the same as with one worker.
+        """
         self.piece = piece  # '●' or '○'
         self.depth = depth
+        self.time_limit_ms = time_limit_ms
+        self.move_ordering = move_ordering  # Center-first, killer and history ordering of moves
         self.opponent_piece = '●' if piece == '○' else '○'
+        self.player = PIECES.index(piece)
+        # Kept across get_move calls so later turns reuse earlier searches
+        self.tt = TranspositionTable(tt_memory_mb, tt_replacement)
+        self.evaluator = WindowEvaluator()
+        self.solver = Solver()
+        self.solver_empty_cells = solver_empty_cells
+        self.killers = [[None, None] for _ in range(ROWS * COLS + 1)]  # Two cutoff moves per move number
+        self.history_scores = [[0] * COLS, [0] * COLS]  # Cutoff counts per player and column
+        self._last_move_count = 0
+        self._deadline = None
+        self._stop_requested = False  # Set from another thread by stop()
+        self.nodes = 0
+        self.cutoffs = 0  # Beta cutoffs in the current search
+        self.last_search_depth = 0  # Read by PerformanceEvaluator
+        self.last_nodes_expanded = 0
+        self.last_cutoffs = 0
+        self.last_tt_probes = 0
+        self.last_tt_hits = 0
+        self.last_score = 0  # Value of the chosen move for this agent; beyond WIN_SCORE means decided
+        self.last_exact = False  # Whether last_score came from the solver, so even a draw is proven
+        self.workers = workers
+        self._worker_args = (piece, depth, tt_memory_mb, tt_replacement, move_ordering)
+        self._pool = None  # Started on the first parallel search
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None  # Process pools cannot be pickled; a copy starts its own
+        return state
 
-    def evaluate_position(self, game):
-        """Returns a score based on board evaluation."""
-        if game.check_winner_piece(self.piece):
-            return 10000
-        elif game.check_winner_piece(self.opponent_piece):
-            return -10000
-        return 0  # Neutral state
+    def stop(self):
+        """Asks a get_move running in another thread to finish early.
+
+        A timed search returns the best move of its last finished depth; a fixed-depth search
+        returns None. A request made before the search has started still counts; it is cleared
+        when the search finishes. Root moves already handed to the worker processes of a
+        parallel search are searched to the end, so the stop takes effect once they return.
+        """
+        self._stop_requested = True
+
+    def close(self):
+        """Stops the worker processes of the parallel search."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def reset(self):
+        """Forgets everything learned in the current game."""
+        self.tt.clear()
+        self.solver.table.clear()
+        self.killers = [[None, None] for _ in range(ROWS * COLS + 1)]
+        self.history_scores = [[0] * COLS, [0] * COLS]
+        self._last_move_count = 0
+
+    def evaluate_position(self, game, depth=0):
+        """Returns a score based on board evaluation.
+
+        Wins score WIN_SCORE plus the remaining depth, so quicker wins are preferred. Other
+        positions get the window heuristic, which minimax keeps in step with the board.
+        """
+        if game.winner == self.piece:
+            return WIN_SCORE + depth
+        elif game.winner == self.opponent_piece:
+            return -WIN_SCORE - depth
+        return self.evaluator.score if self.player == 0 else -self.evaluator.score
+
+    def order_moves(self, game, valid_columns, player, tt_move, first_column):
+        """Puts the most promising columns first so alpha-beta cuts off sooner."""
+        if self.move_ordering:
+            history = self.history_scores[player]
+            valid_columns.sort(key=lambda c: (history[c], -CENTER_DISTANCE[c]), reverse=True)
+            killers = self.killers[len(game.history)]
+            promoted = (killers[1], killers[0], tt_move, first_column)
+        else:
+            promoted = (tt_move, first_column)
+        for col in promoted:  # The last one moved to the front ends up searched first
+            if col in valid_columns:
+                valid_columns.remove(col)
+                valid_columns.insert(0, col)
+        return valid_columns
+
+    def record_cutoff(self, game, col, player, depth):
+        """Remembers a move that caused a cutoff for the killer and history heuristics."""
+        self.cutoffs += 1
+        killers = self.killers[len(game.history)]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        self.history_scores[player][col] += depth * depth
+
+    def minimax(self, game, depth, alpha, beta, maximizing_player, first_column=None):
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and (
+                self._stop_requested or self._deadline is not None and time.perf_counter() > self._deadline):
+            raise SearchTimeout
+
+        if depth == 0 or game.is_terminal():
+            return None, self.evaluate_position(game, depth)
 
-    def minimax(self, game, depth, alpha, beta, maximizing_player):
         valid_columns = game.get_valid_columns()
-        is_terminal = game.check_winner_piece(self.piece) or game.check_winner_piece(self.opponent_piece) or len(valid_columns) == 0
-
-        if depth == 0 or is_terminal:
-            return None, self.evaluate_position(game)
-
-        if maximizing_player:
-            value = -math.inf
-            best_column = random.choice(valid_columns)
-            for col in valid_columns:
-                temp_game = game.copy()
-                temp_game.drop_piece(col, self.piece)
-                _, new_score = self.minimax(temp_game, depth-1, alpha, beta, False)
+
+        # A position and its mirror image share one entry; moves are stored for the canonical side
+        key, mirrored = game.canonical_key()
+        if not maximizing_player:
+            key ^= MINIMIZING_KEY
+        alpha_orig, beta_orig = alpha, beta
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            entry_depth, score, flag, tt_move = entry
+            if mirrored:
+                tt_move = mirror_column(tt_move)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return tt_move, score
+                elif flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return tt_move, score
+
+        player = self.player if maximizing_player else 1 - self.player
+        valid_columns = self.order_moves(game, valid_columns, player, tt_move, first_column)
+        best_column = valid_columns[0]
+        value = -math.inf if maximizing_player else math.inf
+        for col in valid_columns:
+            child = self.make_move(game, col, player)
+            _, new_score = self.minimax(child, depth-1, alpha, beta, not maximizing_player)
+            self.unmake_move(game, col, player)
+            if maximizing_player:
                 if new_score > value:
                     value = new_score
                     best_column = col
                 alpha = max(alpha, value)
-                if alpha >= beta:
-                    break
-            return best_column, value
-        else:
-            value = math.inf
-            best_column = random.choice(valid_columns)
-            for col in valid_columns:
-                temp_game = game.copy()
-                temp_game.drop_piece(col, self.opponent_piece)
-                _, new_score = self.minimax(temp_game, depth-1, alpha, beta, True)
+            else:
                 if new_score < value:
                     value = new_score
                     best_column = col
                 beta = min(beta, value)
-                if alpha >= beta:
-                    break
-            return best_column, value
+            if alpha >= beta:
+                self.record_cutoff(game, col, player, depth)
+                break
+
+        if value <= alpha_orig:
+            flag = UPPER_BOUND
+        elif value >= beta_orig:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, value, flag, mirror_column(best_column) if mirrored else best_column)
+        return best_column, value
 
     def get_move(self, game: Connect4Game):
         """Returns the best move using Minimax algorithm."""
-        best_col, _ = self.minimax(game, self.depth, -math.inf, math.inf, True)
+        try:
+            return self.search_move(game)
+        finally:
+            self._stop_requested = False  # Cleared here, not on entry, so an early stop() is not lost
+
+    def search_move(self, game):
+        """get_move without the stop flag handling."""
+        if len(game.history) < self._last_move_count:
+            self.reset()  # A new game has started, earlier results no longer apply
+        self._last_move_count = len(game.history)
+        self.tt.new_search()
+        self.evaluator.reset(game)
+        self.nodes = 0
+        self.cutoffs = 0
+        tt_probes, tt_hits = self.tt.probes, self.tt.hits
+        self.last_cutoffs = self.last_tt_probes = self.last_tt_hits = 0
+        self.last_exact = False
+
+        solver_nodes = self.solver.nodes
+        solved = endgame_move(game, self.solver, self.solver_empty_cells)
+        if solved is not None:
+            best_col, score = solved
+            # Solver scores count remaining moves of the winner; map them onto the search's scale
+            self.last_score = score + (WIN_SCORE if score > 0 else -WIN_SCORE if score < 0 else 0)
+            self.last_search_depth = ROWS * COLS - (game.bitboards[0] | game.bitboards[1]).bit_count()
+            self.last_nodes_expanded = self.solver.nodes - solver_nodes
+            self.last_exact = True
+            return best_col
+
+        if self.time_limit_ms is None:
+            root_moves = len(game.history)
+            try:
+                best_col, self.last_score = self.search_root(game, self.depth)
+            except SearchTimeout:
+                while len(game.history) > root_moves:
+                    game.undo_move()
+                return None  # Stopped before the search finished
+            self.last_search_depth = self.depth
+        else:
+            best_col = self.iterative_deepening(game)
+        self.last_nodes_expanded = self.nodes
+        self.last_cutoffs = self.cutoffs
+        self.last_tt_probes = self.tt.probes - tt_probes
+        self.last_tt_hits = self.tt.hits - tt_hits
+        return best_col
+
+    def search_root(self, game, depth, first_column=None):
+        """Searches the root moves and returns (best column, score).
+
+        Root moves go center-first, or first_column first, so their order depends only on the
+        position. Ties go to the earlier move. Together that makes the result independent of
+        how many workers share the search.
+        """
+        self.nodes += 1
+        columns = sorted(game.get_valid_columns(), key=CENTER_DISTANCE.__getitem__) if self.move_ordering \
+            else game.get_valid_columns()
+        if first_column in columns:
+            columns.remove(first_column)
+            columns.insert(0, first_column)
+
+        # The first move is searched alone so the others get a window to cut off against
+        best_col = columns[0]
+        best_value = self.search_child(game, best_col, depth, -math.inf)
+        if self.workers > 1 and len(columns) > 1:
+            scores = self.search_parallel(game, columns[1:], depth, best_value)
+            for col, score in zip(columns[1:], scores):
+                if score > best_value:
+                    best_col, best_value = col, score
+        else:
+            for col in columns[1:]:
+                score = self.search_child(game, col, depth, best_value)
+                if score > best_value:
+                    best_col, best_value = col, score
+        return best_col, best_value
+
+    def search_child(self, game, col, depth, alpha):
+        """Plays a root move and scores the position after it with alpha-beta."""
+        child = self.make_move(game, col, self.player)
+        _, score = self.minimax(child, depth - 1, alpha, math.inf, False)
+        self.unmake_move(game, col, self.player)
+        return score
+
+    def make_move(self, game, col, player):
+        """Plays a move in place, instead of copying the game, and returns the position to search."""
+        self.evaluator.add(player, game.heights[col])
+        game.drop_piece(col, PIECES[player])
+        return game
+
+    def unmake_move(self, game, col, player):
+        """Takes back make_move."""
+        game.undo_move()
+        self.evaluator.remove(player, game.heights[col])
+
+    def search_parallel(self, game, columns, depth, alpha):
+        """Scores root moves in the worker processes, all against the same alpha.
+
+        A move scored above alpha has its exact value, anything else cannot beat the first move,
+        so picking the best in root order gives what the serial search picks.
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_search_worker,
+                                             initargs=self._worker_args)
+        futures = [self._pool.submit(_search_root_move, game, col, depth, alpha, self._deadline)
+                   for col in columns]
+        results = [future.result() for future in futures]
+        for _, nodes, cutoffs, probes, hits in results:
+            self.nodes += nodes
+            self.cutoffs += cutoffs
+            self.tt.probes += probes  # Worker tables count towards this agent's hit rate
+            self.tt.hits += hits
+        if any(result[0] is None for result in results):
+            raise SearchTimeout
+        return [result[0] for result in results]
+
+    def iterative_deepening(self, game):
+        """Searches one ply deeper at a time and keeps the result of the deepest finished search."""
+        start = time.perf_counter()
+        root_moves = len(game.history)
+        max_depth = ROWS * COLS - (game.bitboards[0] | game.bitboards[1]).bit_count()  # Empty cells left
+        best_col = None
+        self.last_search_depth = 0
+        try:
+            for depth in range(1, max_depth + 1):
+                # Depth 1 always finishes so there is a move to return
+                self._deadline = start + self.time_limit_ms / 1000 if depth > 1 else None
+                best_col, score = self.search_root(game, depth, first_column=best_col)
+                self.last_search_depth = depth
+                self.last_score = score
+                if abs(score) >= WIN_SCORE:
+                    break  # The result is already decided, searching deeper changes nothing
+        except SearchTimeout:
+            # Unwind the moves the interrupted search left on the board; the evaluator is
+            # rebuilt at the start of the next search
+            while len(game.history) > root_moves:
+                game.undo_move()
+        finally:
+            self._deadline = None
         return best_col
@@ -1,26 +1,120 @@
+from collections import OrderedDict
+
 import joblib
 import numpy as np
-import pandas as pd
+
+from bots.forest_predictor import FlatForest
+from connect_4_game import ROWS, COLS
+
+# Feature names the model was trained with, built once instead of on every move
+FEATURE_NAMES = [f"col_{i}" for i in range(42)]
+
 
 class MLAgent:
-    def __init__(self, model_path, piece):
-        """Initialize the ML agent by loading the trained model."""
-        self.model = joblib.load(model_path)  # Load saved ML model
+    def __init__(self, model_path, piece, mode="rank", cache_size=100000):
+        """Initialize the ML agent by loading the trained model.
+
+        mode "rank" scores every legal child position with the outcome model and plays the
+        best one; mode "label" uses the predicted label directly as the column, as the agent
+        originally did.
+        """
+        if mode not in ("rank", "label"):
+            raise ValueError(f"Unknown MLAgent mode: {mode}")
+        self.model_path = model_path
         self.piece = piece
+        self.mode = mode
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # Position hash -> expected outcome for '●', least recently used first
+        self.load_model()
+
+    def load_model(self):
+        """Loads the saved model and prepares it for plain NumPy input.
+
+        A .npy path is a forest exported by ml_training.export_model and is memory-mapped;
+        anything else is a joblib pickle.
+        """
+        if self.model_path.endswith(".npy"):
+            self.model = FlatForest.load(self.model_path)
+        else:
+            self.model = joblib.load(self.model_path)  # Load saved ML model
+        feature_names = getattr(self.model, "feature_names_in_", None)
+        if feature_names is not None:
+            if list(feature_names) != FEATURE_NAMES:
+                raise ValueError(f"Model at {self.model_path} expects features {list(feature_names)[:3]}..., "
+                                 f"not {FEATURE_NAMES[:3]}...")
+            # The names match the cached layout, so rows can be passed as arrays without a DataFrame
+            del self.model.feature_names_in_
+        # Outcome labels are from Player 1's ('●') point of view: -1 loss, 0 draw, 1 win
+        self.class_values = np.asarray(self.model.classes_, dtype=float)
+
+    def __getstate__(self):
+        """Pickles without the model; worker processes load it once from model_path instead."""
+        state = self.__dict__.copy()
+        del state["model"]
+        state["cache"] = OrderedDict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.load_model()
 
     def get_move(self, game):
         """Predict the best move using the trained ML model."""
-        # Convert board state to DataFrame with correct feature names
-        board_state = np.array(game.get_board_state()).flatten()
-        column_names = [f"col_{i}" for i in range(42)]
-        board_state_df = pd.DataFrame([board_state], columns=column_names)
+        return self.get_moves([game])[0]
+
+    def get_moves(self, games):
+        """Predicts moves for many games with a single model call."""
+        if self.mode == "rank":
+            return self.rank_moves(games)
+
+        board_states = np.stack([game.get_board_state(uci_features=True) for game in games])
+        predicted_moves = self.model.predict(board_states)
+
+        moves = []
+        for game, predicted_move in zip(games, predicted_moves):
+            # Ensure the move is valid
+            valid_moves = game.get_valid_columns()
+            if predicted_move not in valid_moves:
+                predicted_move = np.random.choice(valid_moves)  # Fallback if prediction is invalid
+            moves.append(int(predicted_move))
+        return moves
 
-        # Predict the best column to drop the piece in
-        predicted_move = self.model.predict(board_state_df)[0]  # Extract single prediction
+    def rank_moves(self, games):
+        """Plays, in every game, the column whose resulting position has the best expected outcome."""
+        candidates = []  # (game index, column, position key, sign, score or None)
+        to_score = {}  # Canonical position key -> board state of positions missing from the cache
+        for i, game in enumerate(games):
+            sign = 1 if game.turn == 0 else -1  # Scores are for '●'; flip them when playing '○'
+            for col in game.get_valid_columns():
+                result = game.drop_piece(col)
+                key, mirrored = game.canonical_key()  # Mirror images share one cache entry
+                if result is not True and result is not False:
+                    score = np.inf  # An immediate win needs no model
+                elif key in self.cache:
+                    self.cache.move_to_end(key)
+                    score = sign * self.cache[key]
+                else:
+                    score = None
+                    state = game.get_board_state(uci_features=True)
+                    if mirrored:
+                        state = state.reshape(COLS, ROWS)[::-1].ravel()  # Always score the canonical side
+                    to_score[key] = state.copy()  # The view follows undo_move
+                candidates.append((i, col, key, sign, score))
+                game.undo_move()
 
-        # Ensure the move is valid
-        valid_moves = game.get_valid_columns()
-        if predicted_move not in valid_moves:
-            predicted_move = np.random.choice(valid_moves)  # Fallback if prediction is invalid
+        scored = {}
+        if to_score:
+            # Every unseen child of every game is scored in one vectorized call
+            probabilities = self.model.predict_proba(np.stack(list(to_score.values())))
+            scored = dict(zip(to_score, (probabilities @ self.class_values).tolist()))
+            self.cache.update(scored)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
 
-        return predicted_move
+        best = [(-np.inf, None)] * len(games)
+        for i, col, key, sign, score in candidates:
+            if score is None:
+                score = sign * scored[key]
+            if score > best[i][0] or best[i][1] is None:
+                best[i] = (score, col)
+        return [col for _, col in best]
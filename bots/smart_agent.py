@@ -1,45 +1,55 @@
 import random
-from connect_4_game import Connect4Game
+from bots.solver import Solver, endgame_move
+from bots.threats import COLUMN_MASKS, ThreatTracker, first_column, playable_cells
+from connect_4_game import Connect4Game, PIECES
 
 class SmartAgent:
-    def __init__(self, piece):
+    def __init__(self, piece, solver_empty_cells=12):
         self.piece = piece  # '●' for Player 1, '○' for Player 2
+        self.solver = Solver()
+        self.solver_empty_cells = solver_empty_cells  # Endgames this small are solved exactly
+        self.threats = ThreatTracker()  # Follows the game move by move instead of copying it
+
+    def reset(self):
+        """Forgets the positions solved in the current game."""
+        self.solver.table.clear()
 
     def get_move(self, game: Connect4Game):
         """Returns the best move based on simple rules."""
-        valid_moves = [col for col in range(7) if game.get_lowest_empty_row(col) is not None]
-        opponent_piece = '●' if self.piece == '○' else '○'
+        # Rule 0: Play perfectly in small endgames
+        solved = endgame_move(game, self.solver, self.solver_empty_cells)
+        if solved is not None:
+            return solved[0]
+
+        self.threats.sync(game)
+        player = PIECES.index(self.piece)
+        playable = playable_cells(self.threats.mask)
+        valid_moves = [col for col in range(7) if playable & COLUMN_MASKS[col]]
 
         # Rule 1: Check if it can win
-        for col in valid_moves:
-            temp_game = game.copy()
-            row = temp_game.get_lowest_empty_row(col)
-            if row is not None:
-                temp_game.board[row][col] = self.piece
-                if temp_game.check_winner(row, col, self.piece):  # ✅ Fix: Pass row, col, and piece
-                    return col  # Play winning move
+        col = first_column(self.threats.winning_moves(player))
+        if col is not None:
+            return col  # Play winning move
 
         # Rule 2: Block opponent's win
-        for col in valid_moves:
-            temp_game = game.copy()
-            row = temp_game.get_lowest_empty_row(col)
-            if row is not None:
-                temp_game.board[row][col] = opponent_piece
-                if temp_game.check_winner(row, col, opponent_piece):  # ✅ Fix: Pass row, col, and piece
-                    return col  # Block opponent's win
+        col = first_column(self.threats.winning_moves(1 - player))
+        if col is not None:
+            return col  # Block opponent's win
 
         # Rule 3: Prioritize center column
         if 3 in valid_moves:
             return 3
 
-        # Rule 4: Choose a move that builds a two-in-a-row setup
+        # Rule 4: Build a three-in-a-row with an open end, else an unblocked two-in-a-row
+        two_in_a_row = None
         for col in valid_moves:
-            row = game.get_lowest_empty_row(col)
-            if row is not None:
-                temp_game = game.copy()
-                temp_game.board[row][col] = self.piece  # Simulate move
-                if temp_game.check_winner(row, col, self.piece):  # ✅ Fix: Pass row, col, and piece
-                    return col
+            move = playable & COLUMN_MASKS[col]
+            if self.threats.creates_threat(player, move):
+                return col
+            if two_in_a_row is None and self.threats.creates_two(player, move):
+                two_in_a_row = col
+        if two_in_a_row is not None:
+            return two_in_a_row
 
         # Rule 5: Pick a random valid move if no better option
         return random.choice(valid_moves)
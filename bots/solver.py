@@ -0,0 +1,136 @@
+from bots.threats import BOTTOM_MASK, BOARD_MASK, COLUMN_MASKS, winning_cells
+from bots.transposition_table import TranspositionTable, LOWER_BOUND, UPPER_BOUND
+from connect_4_game import ROWS, COLS
+
+SIZE = ROWS * COLS
+KEY_MULTIPLIER = 0x9E3779B97F4A7C15  # Odd, so multiplying keys modulo 2**64 never merges two
+KEY_BITS = (1 << 64) - 1
+CENTER_ORDER = sorted(range(COLS), key=lambda c: abs(c - COLS // 2))  # 3, 2, 4, 1, 5, 0, 6
+
+
+def table_key(position, mask):
+    """Unique key of a position, scrambled so that every bit reaches the table index.
+
+    position + mask alone is unique but varies mostly in its high bits, which a power-of-two
+    table size ignores, so nearly all positions would share a few slots.
+    """
+    key = (position + mask) * KEY_MULTIPLIER & KEY_BITS
+    return key ^ (key >> 32)
+
+
+def position_of(game):
+    """Returns (stones of the player to move, mask of all stones, number of moves played)."""
+    mask = game.bitboards[0] | game.bitboards[1]
+    moves = mask.bit_count()
+    return game.bitboards[moves % 2], mask, moves
+
+
+def endgame_move(game, solver, solver_empty_cells):
+    """Returns (column, score) from the solver once at most solver_empty_cells cells are empty, else None."""
+    if solver is not None and SIZE - (game.bitboards[0] | game.bitboards[1]).bit_count() <= solver_empty_cells:
+        return solver.best_move(game)
+    return None
+
+
+class Solver:
+    def __init__(self, table_memory_mb=16):
+        """Exact Connect 4 solver: negamax with alpha-beta, null windows and a transposition table.
+
+        Scores follow the usual convention: positive if the player to move wins, 0 for a draw,
+        and larger the sooner the game is won (a win with the player's last stone scores 1).
+        The table is a fixed-size TranspositionTable, so it stays within table_memory_mb.
+        """
+        # table_key -> bound on the score; newer entries always replace older ones
+        self.table = TranspositionTable(table_memory_mb, "always")
+        self.nodes = 0
+
+    def negamax(self, position, mask, moves, alpha, beta):
+        """Scores a position where the player to move cannot win immediately."""
+        self.nodes += 1
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        opponent_wins = winning_cells(position ^ mask, mask)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                return -((SIZE - moves) // 2)  # Two threats cannot both be blocked
+            possible = forced
+        candidates = possible & ~(opponent_wins >> 1)  # Never play right under an opponent's threat
+        if not candidates:
+            return -((SIZE - moves) // 2)
+        if moves >= SIZE - 2:
+            return 0  # Only a draw is left
+
+        low = -((SIZE - 2 - moves) // 2)
+        high = (SIZE - 1 - moves) // 2
+        key = table_key(position, mask)
+        entry = self.table.probe(key)
+        if entry is not None:
+            if entry[2] == LOWER_BOUND:
+                low = max(low, entry[1])
+            else:
+                high = min(high, entry[1])
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        # Try the moves that create the most new threats first, center columns breaking ties
+        ordered = []
+        for c in CENTER_ORDER:
+            move = candidates & COLUMN_MASKS[c]
+            if move:
+                ordered.append((-winning_cells(position | move, mask).bit_count(), len(ordered), move))
+        ordered.sort()
+
+        for _, _, move in ordered:
+            score = -self.negamax(position ^ mask, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                self.table.store(key, 0, score, LOWER_BOUND, None)
+                return score
+            if score > alpha:
+                alpha = score
+        self.table.store(key, 0, alpha, UPPER_BOUND, None)
+        return alpha
+
+    def solve_position(self, position, mask, moves):
+        """Exact score of a position, found by narrowing null-window searches."""
+        if winning_cells(position, mask) & ((mask + BOTTOM_MASK) & BOARD_MASK):
+            return (SIZE + 1 - moves) // 2
+        low, high = -((SIZE - moves) // 2), (SIZE + 1 - moves) // 2
+        while low < high:
+            mid = low + (high - low) // 2
+            if mid <= 0 and int(low / 2) < mid:
+                mid = int(low / 2)
+            elif mid >= 0 and int(high / 2) > mid:
+                mid = int(high / 2)
+            score = self.negamax(position, mask, moves, mid, mid + 1)
+            if score <= mid:
+                high = score
+            else:
+                low = score
+        return low
+
+    def solve(self, game):
+        """Exact score of the game's position for the player to move."""
+        return self.solve_position(*position_of(game))
+
+    def best_move(self, game):
+        """Returns (column, score) of an optimal move; ties go to the more central column."""
+        position, mask, moves = position_of(game)
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        wins = winning_cells(position, mask) & possible
+        best = None
+        for c in CENTER_ORDER:
+            move = possible & COLUMN_MASKS[c]
+            if not move:
+                continue
+            if wins & move:
+                return c, (SIZE + 1 - moves) // 2
+            score = -self.solve_position(position ^ mask, mask | move, moves + 1)
+            if best is None or score > best[1]:
+                best = (c, score)
+        return best
@@ -0,0 +1,94 @@
+from bots.evaluation import WINDOWS, CELL_WINDOWS
+from connect_4_game import ROWS, COLS, H1
+
+BOTTOM_MASK = sum(1 << (c * H1) for c in range(COLS))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1)
+COLUMN_MASKS = [((1 << ROWS) - 1) << (c * H1) for c in range(COLS)]
+# The windows of bots.evaluation as bitmasks, listed per cell
+WINDOW_MASKS = [sum(1 << bit for bit in window) for window in WINDOWS]
+CELL_WINDOW_MASKS = [[WINDOW_MASKS[w] for w in windows] for windows in CELL_WINDOWS]
+
+
+def winning_cells(position, mask):
+    """Empty cells that would complete 4 in a row for the stones in position."""
+    # Vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+    # Horizontal and both diagonals
+    for shift in (H1, H1 - 1, H1 + 1):
+        p = (position << shift) & (position << 2 * shift)
+        r |= p & (position << 3 * shift)
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> 2 * shift)
+        r |= p & (position << shift)
+        r |= p & (position >> 3 * shift)
+    return r & (BOARD_MASK ^ mask)
+
+
+def playable_cells(mask):
+    """The lowest empty cell of every column that is not full."""
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+
+def first_column(cells):
+    """Lowest-numbered column holding one of the cells, or None."""
+    if not cells:
+        return None
+    return ((cells & -cells).bit_length() - 1) // H1
+
+
+class ThreatTracker:
+    def __init__(self):
+        """Winning cells of both players, kept up to date one move at a time.
+
+        A move can only add threats for the player who made it, and only removes the cell it
+        fills from the other player's, so each move costs one bitboard scan.
+        """
+        self.bitboards = [0, 0]
+        self.mask = 0
+        self.history = []
+        self.threats = [0, 0]  # Empty cells completing 4 in a row, per player
+
+    def reset(self, game):
+        """Starts over from the game's current position."""
+        self.bitboards = game.bitboards[:]
+        self.mask = game.bitboards[0] | game.bitboards[1]
+        self.history = game.history[:]
+        self.threats = [winning_cells(bitboard, self.mask) for bitboard in self.bitboards]
+
+    def play(self, col, player):
+        move = playable_cells(self.mask) & COLUMN_MASKS[col]
+        self.bitboards[player] |= move
+        self.mask |= move
+        self.history.append(col)
+        self.threats[player] = winning_cells(self.bitboards[player], self.mask)
+        self.threats[1 - player] &= ~move
+
+    def sync(self, game):
+        """Catches up with the moves played on the game since the last call."""
+        known = len(self.history)
+        if game.history[:known] != self.history:
+            self.reset(game)  # Moves were taken back or a new game started
+            return
+        for col in game.history[known:]:
+            move = playable_cells(self.mask) & COLUMN_MASKS[col]
+            self.play(col, 0 if game.bitboards[0] & move else 1)
+        if self.mask != game.bitboards[0] | game.bitboards[1]:
+            self.reset(game)  # The board was set directly, without a move history
+
+    def winning_moves(self, player):
+        """Cells the player can play right now to win."""
+        return self.threats[player] & playable_cells(self.mask)
+
+    def creates_threat(self, player, move):
+        """Whether playing the move cell gives the player a new cell to win on (an open three)."""
+        mask = self.mask | move
+        return bool(winning_cells(self.bitboards[player] | move, mask) & ~self.threats[player])
+
+    def creates_two(self, player, move):
+        """Whether the move cell forms two in a row in a line the opponent has not blocked."""
+        own = self.bitboards[player] | move
+        opponent = self.bitboards[1 - player]
+        for window in CELL_WINDOW_MASKS[move.bit_length() - 1]:
+            if not window & opponent and (own & window).bit_count() == 2:
+                return True
+        return False
@@ -0,0 +1,51 @@
+# Bound types stored with every entry
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+ENTRY_BYTES = 128  # Rough size of one stored entry (tuple plus its ints) used to size the table
+
+
+class TranspositionTable:
+    def __init__(self, max_memory_mb=16, replacement="depth"):
+        """Fixed-size table of search results indexed by Zobrist hash.
+
+        replacement is "depth" (keep the deeper result unless it is from an older search)
+        or "always" (the newest result wins the slot).
+        """
+        if replacement not in ("depth", "always"):
+            raise ValueError(f"Unknown replacement policy: {replacement}")
+        self.size = max(1, int(max_memory_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.replacement = replacement
+        self.slots = [None] * self.size
+        self.generation = 0  # Bumped for every new root search so stale entries can be replaced
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        """Marks the start of a new root search; older entries become replaceable."""
+        self.generation += 1
+
+    def clear(self):
+        """Drops every entry, e.g. when a new game starts."""
+        self.slots = [None] * self.size
+        self.generation = 0
+
+    def probe(self, key):
+        """Returns (depth, score, flag, best_move) for the position, or None."""
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+        return None
+
+    def store(self, key, depth, score, flag, best_move):
+        """Saves a search result, subject to the replacement policy."""
+        index = key % self.size
+        entry = self.slots[index]
+        if (self.replacement == "depth" and entry is not None and entry[0] != key
+                and entry[5] == self.generation and entry[1] > depth):
+            return  # Keep the deeper result from the current search
+        self.slots[index] = (key, depth, score, flag, best_move, self.generation)
+
+    def __len__(self):
+        return sum(entry is not None for entry in self.slots)
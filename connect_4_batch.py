@@ -0,0 +1,228 @@
+# Check the vector policies against the scalar agents: python connect_4_batch.py (exits 1 on a mismatch)
+import random
+import sys
+import time
+
+import numpy as np
+
+from bots import threats
+from connect_4_game import Connect4Game, ROWS, COLS, H1, PIECES
+
+# Bitboards use the same layout as Connect4Game, one uint64 per game
+BOTTOM_MASK = np.uint64(sum(1 << (c * H1) for c in range(COLS)))
+BOARD_MASK = np.uint64(sum(((1 << ROWS) - 1) << (c * H1) for c in range(COLS)))
+COLUMN_MASKS = np.array([((1 << ROWS) - 1) << (c * H1) for c in range(COLS)], dtype=np.uint64)
+WINDOW_MASKS = np.array(threats.WINDOW_MASKS, dtype=np.uint64)
+CENTER = COLS // 2
+NO_WINNER = -1
+
+
+def is_winning(bitboards):
+    """Batched shift-and-mask win check; returns one bool per bitboard."""
+    won = np.zeros(bitboards.shape, dtype=bool)
+    for shift in (1, H1, H1 - 1, H1 + 1):  # Vertical, horizontal, diagonal \, diagonal /
+        pairs = bitboards & (bitboards >> np.uint64(shift))
+        won |= (pairs & (pairs >> np.uint64(2 * shift))) != 0
+    return won
+
+
+def winning_cells(position, mask):
+    """Batched version of bots.threats.winning_cells: empty cells that complete 4 in a row."""
+    r = (position << np.uint64(1)) & (position << np.uint64(2)) & (position << np.uint64(3))
+    for shift in (H1, H1 - 1, H1 + 1):
+        s1, s2, s3 = np.uint64(shift), np.uint64(2 * shift), np.uint64(3 * shift)
+        p = (position << s1) & (position << s2)
+        r |= p & (position << s3)
+        r |= p & (position >> s1)
+        p = (position >> s1) & (position >> s2)
+        r |= p & (position << s1)
+        r |= p & (position >> s3)
+    return r & (BOARD_MASK ^ mask)
+
+
+class BatchConnect4:
+    def __init__(self, num_games):
+        """num_games Connect 4 games advanced together, stored as bitboard vectors."""
+        self.num_games = num_games
+        self.bitboards = np.zeros((2, num_games), dtype=np.uint64)  # Indexed like PIECES
+        self.heights = np.zeros((num_games, COLS), dtype=np.int8)  # Pieces in every column
+        self.turn = np.zeros(num_games, dtype=np.int8)
+        self.moves = np.zeros(num_games, dtype=np.int8)
+        self.winner = np.full(num_games, NO_WINNER, dtype=np.int8)  # Player index, or NO_WINNER
+        self.game_over = np.zeros(num_games, dtype=bool)
+
+    @classmethod
+    def from_games(cls, games):
+        """Loads the positions of scalar Connect4Game objects."""
+        batch = cls(len(games))
+        for i, game in enumerate(games):
+            batch.bitboards[:, i] = game.bitboards
+            batch.heights[i] = [h - c * H1 for c, h in enumerate(game.heights)]
+            batch.turn[i] = game.turn
+            batch.moves[i] = (game.bitboards[0] | game.bitboards[1]).bit_count()
+            batch.game_over[i] = game.game_over
+            for player in range(2):
+                if game.check_winner_piece(PIECES[player]):
+                    batch.winner[i] = player
+        return batch
+
+    @property
+    def mask(self):
+        return self.bitboards[0] | self.bitboards[1]
+
+    def legal_moves(self):
+        """(N, 7) bool array of the columns each running game can play."""
+        return (self.heights < ROWS) & ~self.game_over[:, None]
+
+    def drop(self, cols):
+        """Plays cols[i] in every running game i; finished games ignore their entry."""
+        running = np.flatnonzero(~self.game_over)
+        cols = np.asarray(cols)[running]
+        if not (self.heights[running, cols] < ROWS).all():
+            raise ValueError("Move into a full column")
+
+        player = self.turn[running]
+        bits = np.uint64(1) << (cols * H1 + self.heights[running, cols]).astype(np.uint64)
+        self.bitboards[player, running] |= bits
+        self.heights[running, cols] += 1
+        self.moves[running] += 1
+
+        won = is_winning(self.bitboards[player, running])
+        self.winner[running[won]] = player[won]
+        self.game_over[running] = won | (self.moves[running] == ROWS * COLS)
+        self.turn[running[~won]] ^= 1  # Like drop_piece, a winning move keeps the turn
+
+    def play_out(self, policies, rng):
+        """Plays every game to the end; policies[p](batch, rng) picks the moves of player p."""
+        while not self.game_over.all():
+            # Games in a batch can be at different move numbers, so ask both policies
+            cols = np.where(self.turn == 0, policies[0](self, rng), policies[1](self, rng))
+            self.drop(cols)
+        return self.winner
+
+
+def random_policy(batch, rng):
+    """Uniformly random legal column for every game, like RandomAgent."""
+    legal = batch.legal_moves()
+    # The largest random key among the legal columns picks a uniform one in one vector pass
+    keys = np.where(legal, rng.random(legal.shape), -1.0)
+    return keys.argmax(axis=1)
+
+
+def first_column(columns):
+    """Index of the lowest True column per row and whether there was one."""
+    return columns.argmax(axis=1), columns.any(axis=1)
+
+
+def smart_rules(batch):
+    """SmartAgent's rules for every game: win, block, take the center, build threes, build twos.
+
+    Returns the chosen columns and which games a rule applied to; the rest need a random move.
+    """
+    mask = batch.mask
+    running = np.arange(batch.num_games)
+    own = batch.bitboards[batch.turn, running]
+    opponent = batch.bitboards[1 - batch.turn, running]
+    playable = (mask + BOTTOM_MASK) & BOARD_MASK
+    own_threats = winning_cells(own, mask)
+
+    # Rule 4 for every column at once: the cell each column would take, then what it builds
+    moves = playable[:, None] & COLUMN_MASKS  # (N, 7), 0 for full columns
+    new_threats = winning_cells(own[:, None] | moves, mask[:, None] | moves) & ~own_threats[:, None]
+    threes = new_threats != 0
+    windows = WINDOW_MASKS[None, None, :]
+    open_windows = (windows & moves[:, :, None] != 0) & (windows & opponent[:, None, None] == 0)
+    twos = (open_windows & (np.bitwise_count((own[:, None] | moves)[:, :, None] & windows) == 2)).any(axis=2)
+
+    cols = np.zeros(batch.num_games, dtype=np.int64)
+    decided = np.zeros(batch.num_games, dtype=bool)
+    # Checked from the weakest rule up, so stronger rules overwrite weaker ones
+    center = np.zeros((batch.num_games, COLS), dtype=bool)
+    center[:, CENTER] = batch.legal_moves()[:, CENTER]
+    rules = [twos & (moves != 0), threes & (moves != 0), center]
+    for cells in (winning_cells(opponent, mask), own_threats):
+        rules.append((cells & playable)[:, None] & COLUMN_MASKS != 0)
+    for hits in rules:
+        col, found = first_column(hits)
+        cols[found] = col[found]
+        decided |= found
+    return cols, decided
+
+
+def smart_policy(batch, rng):
+    """SmartAgent's rules for every game, with a random move where none applies."""
+    cols, decided = smart_rules(batch)
+    return np.where(decided, cols, random_policy(batch, rng))
+
+
+def check_agreement(num_positions=2000, seed=0):
+    """Compares the vector policies with RandomAgent and SmartAgent on random positions.
+
+    Returns False if the smart policy disagrees with SmartAgent anywhere or the random policy
+    picks an illegal move. The outcome rates are only printed, since they vary by chance.
+    """
+    from bots.random_agent import RandomAgent
+    from bots.smart_agent import SmartAgent
+
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+    games = []
+    while len(games) < num_positions:
+        game = Connect4Game()
+        for _ in range(random.randint(0, 30)):
+            if game.game_over:
+                break
+            game.drop_piece(random.choice(game.get_valid_columns()))
+        if not game.game_over:
+            games.append(game)
+    batch = BatchConnect4.from_games(games)
+
+    # Smart: every rule is deterministic and must match exactly. Where both fall back to a
+    # random move, the vector move only has to be legal.
+    agents = [SmartAgent(piece, solver_empty_cells=0) for piece in PIECES]
+    vector = smart_policy(batch, rng)
+    _, decided = smart_rules(batch)
+    legal = batch.legal_moves()
+    mismatches = 0
+    for i, game in enumerate(games):
+        scalar = agents[game.turn].get_move(game)
+        if scalar != vector[i] if decided[i] else not legal[i, vector[i]]:
+            mismatches += 1
+    print(f"smart policy: {mismatches} mismatches in {num_positions} positions")
+
+    # Random: only the distribution can be compared, so check legality and the spread of choices
+    counts = np.zeros(COLS)
+    scalar_counts = np.zeros(COLS)
+    random_agent = RandomAgent('●')
+    illegal = 0
+    for _ in range(50):
+        picks = random_policy(batch, rng)
+        illegal += int((~legal[np.arange(len(games)), picks]).sum())
+        counts += np.bincount(picks, minlength=COLS)
+    for _ in range(50):
+        for game in games:
+            scalar_counts[random_agent.get_move(game)] += 1
+    print(f"random policy: {illegal} illegal moves, largest column share difference "
+          f"{np.abs(counts / counts.sum() - scalar_counts / scalar_counts.sum()).max():.4f}")
+
+    # Whole games: the outcome rates of random against smart should agree within noise
+    start = time.perf_counter()
+    winners = BatchConnect4(10000).play_out((random_policy, smart_policy), rng)
+    elapsed = time.perf_counter() - start
+    print(f"10000 vector games in {elapsed:.2f}s: player 2 won {np.mean(winners == 1):.1%}")
+    scalar_wins = 0
+    for _ in range(500):
+        game = Connect4Game()
+        players = (RandomAgent(PIECES[0]), SmartAgent(PIECES[1], solver_empty_cells=0))
+        result = True
+        while not game.game_over:
+            result = game.drop_piece(players[game.turn].get_move(game))
+        scalar_wins += result == PIECES[1]
+    print(f"500 scalar games: player 2 won {scalar_wins / 500:.1%}")
+    return mismatches == 0 and illegal == 0
+
+
+if __name__ == "__main__":
+    if not check_agreement():
+        print("FAILED: the vector policies disagree with the scalar agents")
+        sys.exit(1)
@@ -1,3 +1,5 @@
+import random
+
 import numpy as np
 
 # Game Constants
@@ -5,63 +7,237 @@ ROWS, COLS = 6, 7
 SQUARESIZE = 80
 RADIUS = SQUARESIZE // 2 - 5
 
+# Bitboard layout: each column uses ROWS + 1 bits (the extra bit is a sentinel
+# that keeps shifted patterns from wrapping into the next column). Bit 0 of a
+# column is its bottom cell, so cell (row, col) lives at col * H1 + (ROWS - 1 - row).
+H1 = ROWS + 1
+PIECES = ('●', '○')  # Index 0 is Player 1 (Red), index 1 is Player 2 (Yellow)
+BOTTOM = [c * H1 for c in range(COLS)]           # Bit index of each column's bottom cell
+TOP = [c * H1 + ROWS - 1 for c in range(COLS)]   # Bit index of each column's top cell
+PIECE_VALUES = (1, -1)  # Numeric encoding of PIECES; empty cells are 0
+SYMBOLS = np.array([' ', '●', '○'])  # Indexed by the numeric encoding, so -1 maps to '○'
+
+# Valid column lists for every combination of full columns, so get_valid_columns is a lookup
+VALID_COLUMNS = [tuple(c for c in range(COLS) if not full & (1 << c)) for full in range(1 << COLS)]
+ALL_FULL = (1 << COLS) - 1
+
+# Zobrist keys: one random 64-bit number per player per bit, xor-ed into the hash as pieces come and go
+_zobrist_rng = random.Random(20250212)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for _ in range(COLS * H1)] for _ in PIECES]
+# The same keys indexed by the mirrored bit, so the mirror image's hash can be kept alongside
+MIRROR_BIT = [(COLS - 1 - bit // H1) * H1 + bit % H1 for bit in range(COLS * H1)]
+MIRROR_ZOBRIST = [[keys[MIRROR_BIT[bit]] for bit in range(COLS * H1)] for keys in ZOBRIST]
+COLUMN_MASK = (1 << H1) - 1
+
+
+def mirror_column(col):
+    """Column index in the left-right mirror image of the board."""
+    return COLS - 1 - col
+
+
+def mirror_bitboard(bitboard):
+    """Flips a bitboard left to right by swapping whole columns."""
+    mirrored = 0
+    for c in range(COLS):
+        mirrored |= ((bitboard >> (c * H1)) & COLUMN_MASK) << (mirror_column(c) * H1)
+    return mirrored
+
+
+def zobrist_hash(bitboards):
+    """Zobrist hash of a position given as two bitboards, as Connect4Game.hash keeps it."""
+    key = 0
+    for player, bitboard in enumerate(bitboards):
+        while bitboard:
+            bit = (bitboard & -bitboard).bit_length() - 1
+            key ^= ZOBRIST[player][bit]
+            bitboard &= bitboard - 1
+    return key
+
+
+def canonical_hash(bitboards):
+    """The smaller hash of a position and its mirror image, as Connect4Game.canonical_key gives."""
+    return min(zobrist_hash(bitboards), zobrist_hash([mirror_bitboard(b) for b in bitboards]))
+
+
+def is_winning_bitboard(bitboard):
+    """Checks if a player's bitboard contains 4 in a row using shift-and-mask."""
+    for shift in (1, H1, H1 - 1, H1 + 1):  # Vertical, horizontal, diagonal \, diagonal /
+        pairs = bitboard & (bitboard >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
 class Connect4Game:
     def __init__(self):
-        self.board = np.full((ROWS, COLS), ' ', dtype=str)
+        self.bitboards = [0, 0]  # One mask per player, indexed like PIECES
+        self.heights = list(BOTTOM)  # Next free bit index in every column
+        self.full_columns = 0  # Bit c is set once column c is full
         self.turn = 0  # 0 for Player 1 (Red), 1 for Player 2 (Yellow)
         self.game_over = False
+        self.winner = None  # Winning piece, recorded by the move that won; None while undecided or drawn
+        self.history = []  # Columns played so far, so moves can be undone in place
+        self.hash = 0  # Zobrist hash of the pieces on the board, updated incrementally
+        self.mirror_hash = 0  # Hash of the board's mirror image
+        # Numeric board (1 / -1 / 0) in the UCI dataset's order: column by column, bottom to top
+        self.cells = np.zeros(ROWS * COLS, dtype=np.int8)
+        self._board_cache = None
+
+    @property
+    def board(self):
+        """The board as a 6x7 array of '●'/'○'/' ', built from the numeric board on demand.
+
+        The array is read-only, since writing a cell would not reach the bitboards; play moves
+        with drop_piece, or assign a whole board to load a position.
+        """
+        if self._board_cache is None:
+            self._board_cache = SYMBOLS[self.get_board_state()]
+            self._board_cache.flags.writeable = False
+        return self._board_cache
+
+    @board.setter
+    def board(self, board):
+        """Loads a 6x7 symbol array into the bitboards."""
+        self.bitboards = [0, 0]
+        self.heights = list(BOTTOM)
+        self.full_columns = 0
+        self.hash = 0
+        self.mirror_hash = 0
+        self.cells = np.zeros(ROWS * COLS, dtype=np.int8)
+        for c in range(COLS):
+            for r in range(ROWS - 1, -1, -1):
+                if board[r][c] in PIECES:
+                    player = PIECES.index(board[r][c])
+                    self.bitboards[player] |= 1 << self.heights[c]
+                    self.hash ^= ZOBRIST[player][self.heights[c]]
+                    self.mirror_hash ^= MIRROR_ZOBRIST[player][self.heights[c]]
+                    self.cells[c * ROWS + self.heights[c] - BOTTOM[c]] = PIECE_VALUES[player]
+                    self.heights[c] += 1
+            if self.heights[c] > TOP[c]:
+                self.full_columns |= 1 << c
+        self.history = []  # Move order is unknown for a loaded board
+        self._board_cache = None
+        # No move recorded the result, so find it the slow way
+        self.winner = next((piece for piece in PIECES if self.scan_winner_piece(piece)), None)
+        self.game_over = self.winner is not None or self.full_columns == ALL_FULL
+
+    def get_board_state(self, uci_features=False):
+        """Returns the board state as a numerical array (1 for '●', -1 for '○', 0 for empty).
+
+        The result is a read-only view of the game's own int8 board, so it costs no copy but
+        follows later moves. By default it is shaped like board (6x7, top row first); with
+        uci_features=True it is the flat 42-value vector in the UCI dataset's column order
+        (a1..a6, b1..b6, ...) that the ML model is trained on.
+        """
+        if uci_features:
+            state = self.cells.view()
+        else:
+            state = self.cells.reshape(COLS, ROWS)[:, ::-1].T  # Columns bottom-up -> rows top-down
+        state.flags.writeable = False
+        return state
+
+    def canonical_key(self):
+        """Returns (key, mirrored): one key for a position and its mirror image.
 
-    def get_board_state(self):
-        """Returns the board state as a numerical array."""
-        mapping = {' ': 0, '●': 1, '○': -1}  # Convert symbols to numbers
-        return np.vectorize(mapping.get)(self.board)  # Convert board to numbers
+        mirrored tells whether the key is the mirror image's, in which case columns stored
+        under it go through mirror_column on the way in and out.
+        """
+        if self.mirror_hash < self.hash:
+            return self.mirror_hash, True
+        return self.hash, False
 
     def get_valid_columns(self):
         """Returns a list of columns that are not full."""
-        return [c for c in range(COLS) if self.board[0][c] == ' ']
+        return list(VALID_COLUMNS[self.full_columns])
 
     def copy(self):
         """Creates a deep copy of the game state for simulation purposes."""
-        new_game = Connect4Game()
-        new_game.board = np.copy(self.board)
+        new_game = Connect4Game.__new__(Connect4Game)
+        new_game.bitboards = self.bitboards[:]
+        new_game.heights = self.heights[:]
+        new_game.full_columns = self.full_columns
         new_game.turn = self.turn
         new_game.game_over = self.game_over
+        new_game.winner = self.winner
+        new_game.history = self.history[:]
+        new_game.hash = self.hash
+        new_game.mirror_hash = self.mirror_hash
+        new_game.cells = self.cells.copy()
+        new_game._board_cache = None
         return new_game
 
     def get_lowest_empty_row(self, col):
         """Returns the lowest available row in a column."""
-        for r in range(ROWS-1, -1, -1):
-            if self.board[r][col] == ' ':
-                return r
-        return None  # Column full
+        if self.full_columns & (1 << col):
+            return None  # Column full
+        return ROWS - 1 - (self.heights[col] - BOTTOM[col])
 
     def drop_piece(self, col, piece=None):
         """Places a piece in the given column and checks for a win."""
-        #print(f"drop_piece called with col: {col}")
         if self.game_over:
             return False  # No more moves allowed
+        if col is None or not 0 <= col < COLS or self.full_columns & (1 << col):
+            return False  # Invalid move
 
-        row = self.get_lowest_empty_row(col)
-        if row is not None:
-            piece = piece if piece else ('●' if self.turn == 0 else '○')
-            self.board[row][col] = piece
-            if self.check_winner(row, col, piece):
-                self.game_over = True
-                return piece  # Return the winning piece
+        piece = piece if piece else PIECES[self.turn]
+        player = PIECES.index(piece)
+        bit = self.heights[col]
+        self.bitboards[player] |= 1 << bit
+        self.hash ^= ZOBRIST[player][bit]
+        self.mirror_hash ^= MIRROR_ZOBRIST[player][bit]
+        self.cells[col * ROWS + bit - BOTTOM[col]] = PIECE_VALUES[player]
+        self.heights[col] = bit + 1
+        if bit == TOP[col]:
+            self.full_columns |= 1 << col
+        self.history.append(col)
+        self._board_cache = None
 
-            self.turn = 1 - self.turn  # Switch turns
-            return True  # Move was successful
-        return False  # Invalid move
+        if is_winning_bitboard(self.bitboards[player]):
+            self.game_over = True
+            self.winner = piece
+            return piece  # Return the winning piece
+
+        if self.full_columns == ALL_FULL:
+            self.game_over = True  # Board full, the game is a draw
+        self.turn = 1 - self.turn  # Switch turns
+        return True  # Move was successful
+
+    def undo_move(self):
+        """Takes back the last move played with drop_piece and returns its column."""
+        if not self.history:
+            return None  # Nothing to undo
+
+        col = self.history.pop()
+        bit = self.heights[col] - 1
+        player = 0 if self.bitboards[0] >> bit & 1 else 1
+        if self.winner is None:
+            self.turn = 1 - self.turn  # A winning move never switched turns
+        self.bitboards[player] ^= 1 << bit
+        self.hash ^= ZOBRIST[player][bit]
+        self.mirror_hash ^= MIRROR_ZOBRIST[player][bit]
+        self.cells[col * ROWS + bit - BOTTOM[col]] = 0
+        self.heights[col] = bit
+        self.full_columns &= ~(1 << col)
+        self.game_over = False
+        self.winner = None
+        self._board_cache = None
+        return col
 
     def check_winner(self, row, col, piece):
         """Checks if placing a piece at (row, col) wins the game."""
-        return (self.check_direction(row, col, piece, 1, 0) or  # Vertical
-                self.check_direction(row, col, piece, 0, 1) or  # Horizontal
-                self.check_direction(row, col, piece, 1, 1) or  # Diagonal /
-                self.check_direction(row, col, piece, 1, -1))   # Diagonal \
+        bit = 1 << (col * H1 + ROWS - 1 - row)
+        return is_winning_bitboard(self.bitboards[PIECES.index(piece)] | bit)
 
     def check_winner_piece(self, piece):
-        """Checks if a given piece has won the game."""
+        """Checks if a given piece has won the game, from the result recorded by drop_piece."""
+        return self.winner == piece
+
+    def is_terminal(self):
+        """Whether the game has ended; it is a draw if it has and winner is None."""
+        return self.game_over
+
+    def scan_winner_piece(self, piece):
+        """Checks every cell for 4 in a row; slow, only for validating the recorded winner."""
         for r in range(ROWS):
             for c in range(COLS):
                 if self.board[r][c] == piece:
@@ -72,21 +248,21 @@ class Connect4Game:
                         return True
         return False
 
-
     def check_direction(self, row, col, piece, dr, dc):
         """Checks 4 in a row in a given direction."""
+        board = self.board
         count = 1  # Include the current piece
         # Check one direction
         for i in range(1, 4):
             r, c = row + dr * i, col + dc * i
-            if 0 <= r < ROWS and 0 <= c < COLS and self.board[r][c] == piece:
+            if 0 <= r < ROWS and 0 <= c < COLS and board[r][c] == piece:
                 count += 1
             else:
                 break
         # Check the opposite direction
         for i in range(1, 4):
             r, c = row - dr * i, col - dc * i
-            if 0 <= r < ROWS and 0 <= c < COLS and self.board[r][c] == piece:
+            if 0 <= r < ROWS and 0 <= c < COLS and board[r][c] == piece:
                 count += 1
             else:
                 break
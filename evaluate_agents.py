@@ -1,22 +1,165 @@
+import os
+import random
 import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import matplotlib.pyplot as plt
 from collections import defaultdict
 
+from bots.mcts_agent import MCTSAgent
 from bots.minimax_agent import MiniMaxAI
 from bots.ml_agent import MLAgent
 from bots.random_agent import RandomAgent
 from bots.smart_agent import SmartAgent
 from connect_4_game import Connect4Game
+from instrumentation import InstrumentedAgent, MoveStats, write_summary
+from results_sink import ResultsSink, read_records
+
+
+def play_game(agent1, agent2, game_class, seed):
+    """Plays one game with seeded randomness and returns its record."""
+    random.seed(seed)
+    np.random.seed(seed)
+    for agent in (agent1, agent2):
+        if hasattr(agent, "reset"):
+            agent.reset()  # Nothing carried over from the previous game
+
+    game = game_class()  # Initialize new game
+    agents = [agent1, agent2]
+    current_agent_idx = 0
+    moves = []
+    move_latency_ms = []
+    search_metrics = []
+    start_time = time.perf_counter()
+
+    while not game.game_over:
+        agent = agents[current_agent_idx]
+        move_start = time.perf_counter()
+        move = agent.get_move(game)  # Get move from agent
+        move_latency_ms.append(round((time.perf_counter() - move_start) * 1000, 3))
+        game.drop_piece(move)
+        moves.append(int(move))
+        current_agent_idx = 1 - current_agent_idx  # Switch agent
+
+        # If Minimax, track search depth & nodes expanded
+        if hasattr(agent, "last_search_depth"):
+            search_metrics.append((agent.last_search_depth, agent.last_nodes_expanded))
+
+    if game.check_winner_piece('●'):
+        winner = '●'
+    elif game.check_winner_piece('○'):
+        winner = '○'
+    else:
+        winner = None
+    return {
+        "winner": winner,
+        "moves": moves,
+        "length": len(moves),
+        "duration": time.perf_counter() - start_time,
+        "move_latency_ms": move_latency_ms,
+        "search_metrics": search_metrics,
+    }
+
+
+def play_games_batched(agent1, agent2, game_class, seeds):
+    """Plays several games in lockstep and returns their records.
+
+    Agents with a get_moves(games) method pick the moves of every running game in one call
+    per ply, so e.g. MLAgent runs inference once per ply instead of once per game. The batch
+    is seeded with its first seed, so results depend on the batch size.
+    """
+    if len(seeds) == 1:
+        return [play_game(agent1, agent2, game_class, seeds[0])]
+
+    random.seed(seeds[0])
+    np.random.seed(seeds[0])
+    for agent in (agent1, agent2):
+        if hasattr(agent, "reset"):
+            agent.reset()
+
+    games = [game_class() for _ in seeds]
+    records = [{"moves": [], "move_latency_ms": [], "search_metrics": []} for _ in seeds]
+    agents = [agent1, agent2]
+    current_agent_idx = 0
+    active = list(range(len(games)))
+
+    while active:
+        agent = agents[current_agent_idx]
+        if hasattr(agent, "get_moves"):
+            move_start = time.perf_counter()
+            moves = agent.get_moves([games[i] for i in active])
+            latency = round((time.perf_counter() - move_start) * 1000 / len(active), 3)  # Shared evenly
+            latencies = [latency] * len(active)
+        else:
+            moves, latencies = [], []
+            for i in active:
+                move_start = time.perf_counter()
+                moves.append(agent.get_move(games[i]))
+                latencies.append(round((time.perf_counter() - move_start) * 1000, 3))
+                if hasattr(agent, "last_search_depth"):
+                    records[i]["search_metrics"].append((agent.last_search_depth, agent.last_nodes_expanded))
+
+        for i, move, latency in zip(active, moves, latencies):
+            games[i].drop_piece(move)
+            records[i]["moves"].append(int(move))
+            records[i]["move_latency_ms"].append(latency)
+        active = [i for i in active if not games[i].game_over]
+        current_agent_idx = 1 - current_agent_idx  # Switch agent
+
+    for game, record in zip(games, records):
+        if game.check_winner_piece('●'):
+            record["winner"] = '●'
+        elif game.check_winner_piece('○'):
+            record["winner"] = '○'
+        else:
+            record["winner"] = None
+        record["length"] = len(record["moves"])
+        record["duration"] = sum(record["move_latency_ms"]) / 1000
+    return records
+
+
+# Agents handed to each pool worker once, so e.g. MLAgent loads its model once per process
+_worker_agents = None
+
+
+def _init_worker(agent1, agent2, game_class):
+    global _worker_agents
+    _worker_agents = (agent1, agent2, game_class)
+
+
+def _play_games_in_worker(seeds):
+    """Plays a batch; returns its records and the move stats of instrumented agents (else None)."""
+    records = play_games_batched(*_worker_agents, seeds)
+    return records, [agent.take_stats() if isinstance(agent, InstrumentedAgent) else None
+                     for agent in _worker_agents[:2]]
 
 
 class PerformanceEvaluator:
-    def __init__(self, agent1, agent2, game_class, num_games=500):
-        """Initialize evaluation between two agents."""
+    def __init__(self, agent1, agent2, game_class, num_games=500, workers=1, seed=0,
+                 results_path=None, verbose=False, batch_size=1, instrumentation_path=None):
+        """Initialize evaluation between two agents.
+
+        Game i is seeded with seed + i, so the totals do not depend on the number of workers.
+        With results_path set, every game is streamed to that .jsonl/.csv file, and games
+        already recorded there are loaded instead of played again; the file must hold no games
+        of other agents or another seed. batch_size > 1 plays that
+        many games in lockstep (see play_games_batched). With instrumentation_path set, both
+        agents are timed move by move (see instrumentation.py) and the latency percentiles and
+        search rates of the games played are written there as JSON.
+        """
         self.agent1 = agent1
         self.agent2 = agent2
         self.game_class = game_class
         self.num_games = num_games
+        self.workers = workers
+        self.seed = seed
+        self.results_path = results_path
+        self.verbose = verbose
+        self.batch_size = batch_size
+        self.instrumentation_path = instrumentation_path
+        self.move_stats = None  # MoveStats per agent once instrumented games have been played
+        self.sink = None
         self.results = {
             "Agent1 Wins": 0,
             "Agent2 Wins": 0,
@@ -28,70 +171,85 @@ class PerformanceEvaluator:
 
     def run_games(self):
         """Run multiple games and collect performance metrics."""
-        for game_num in range(self.num_games):
-            game = self.game_class()  # Initialize new game
-            agents = [self.agent1, self.agent2]
-            current_agent_idx = 0
-            move_count = 0
-            start_time = time.time()
-
-            while not game.game_over:
-                agent = agents[current_agent_idx]
-                move = agent.get_move(game)  # Get move from agent
-                game.drop_piece(move)
+        done = set()
+        if self.results_path:
+            names = (self.agent1.__class__.__name__, self.agent2.__class__.__name__)
+            for record in read_records(self.results_path):
+                if record.get("pairing"):
+                    continue  # A tournament game, numbered within its own pairing
+                if (record["agent1"], record["agent2"]) != names or record["seed"] != self.seed + record["game"]:
+                    raise ValueError(f"{self.results_path} holds games of {record['agent1']} vs {record['agent2']} "
+                                     f"with seed {record['seed'] - record['game']}, not {names[0]} vs {names[1]} "
+                                     f"with seed {self.seed}")
+                if record["game"] < self.num_games and record["game"] not in done:
+                    done.add(record["game"])
+                    self.add_record(record["game"], record)
+            self.sink = ResultsSink(self.results_path)
 
+        game_nums = [game_num for game_num in range(self.num_games) if game_num not in done]
+        seeds = [self.seed + game_num for game_num in game_nums]
+        batches = [seeds[i:i + self.batch_size] for i in range(0, len(seeds), self.batch_size)]
+        agents = (self.agent1, self.agent2)
+        if self.instrumentation_path:
+            agents = tuple(InstrumentedAgent(agent) for agent in agents)
+            self.move_stats = [MoveStats(agent.stats.name) for agent in agents]
+        try:
+            if self.workers <= 1:
+                batch_records = (play_games_batched(*agents, self.game_class, batch) for batch in batches)
+                records = (record for batch in batch_records for record in batch)
+                for game_num, record in zip(game_nums, records):
+                    self.add_record(game_num, record)
+                if self.move_stats:
+                    for stats, agent in zip(self.move_stats, agents):
+                        stats.merge(agent.take_stats())
+                return
 
-                move_count += 1
-                current_agent_idx = 1 - current_agent_idx  # Switch agent
-
-                # If Minimax, track search depth & nodes expanded
-                if hasattr(agent, "last_search_depth"):
-                    self.search_metrics["Depth"].append(agent.last_search_depth)
-                    self.search_metrics["Nodes Expanded"].append(agent.last_nodes_expanded)
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(*agents, self.game_class)) as pool:
+                chunksize = max(1, len(batches) // (self.workers * 4))
+                # map yields in submission order, so results merge exactly as a serial run would
+                pending = iter(game_nums)
+                for batch, batch_stats in pool.map(_play_games_in_worker, batches, chunksize=chunksize):
+                    for record, game_num in zip(batch, pending):  # batch first, so no number is skipped
+                        self.add_record(game_num, record)
+                    if self.move_stats:
+                        for stats, worker_stats in zip(self.move_stats, batch_stats):
+                            stats.merge(worker_stats)
+        finally:
+            if self.sink:
+                self.sink.close()
+                self.sink = None
+            if self.move_stats:
+                write_summary(self.move_stats, self.instrumentation_path)
 
-            # Collect results
-            game_duration = time.time() - start_time
-            self.results["Execution Times"].append(game_duration)
-            self.results["Game Lengths"].append(move_count)
+    def add_record(self, game_num, record):
+        """Merge one finished game into the totals and stream it to the results file."""
+        self.results["Execution Times"].append(record["duration"])
+        self.results["Game Lengths"].append(len(record["moves"]))
+        for depth, nodes in record["search_metrics"]:
+            self.search_metrics["Depth"].append(depth)
+            self.search_metrics["Nodes Expanded"].append(nodes)
 
-            #Determine a winner if any
-            winner, winner_agent = None, None
+        winner = record["winner"]
+        winner_agent = {self.agent1.piece: self.agent1, self.agent2.piece: self.agent2}.get(winner)
+        if winner_agent is self.agent1:
+            self.results["Agent1 Wins"] += 1
+        elif winner_agent is self.agent2:
+            self.results["Agent2 Wins"] += 1
+        else:
+            self.results["Draws"] += 1
 
-            if game.check_winner_piece('●'):
-                print(f"Game {game_num+1}: Red (●) is detected as the winner!")
-                print(game.board)  # Debugging
-                winner = 'Red'
-                winner_agent = self.agent1 if self.agent1.piece == 1 else self.agent2
-            elif game.check_winner_piece('○'):
-                print(f"Game {game_num+1}: Yellow (○) is detected as the winner!")
-                print(game.board)  # Debugging
-                winner = 'Yellow'
-                winner_agent = self.agent1 if self.agent1.piece == 1 else self.agent2
-            else:
-                print(f"Game {game_num+1}: No winner detected.")
-                print(game.board)  # Debugging
-                winner = None
-
-            if winner_agent:
-                print(f"Game {game_num+1}: {winner} ({winner_agent.__class__.__name__}) is detected as the winner!")
-            else:
-                print(f"Game {game_num+1}: No winner detected.")
-
-
-
-            piece_to_color = {self.agent1.piece: "Red", self.agent2.piece: "Yellow"}
-
-            if winner == piece_to_color.get(self.agent1.piece):
-                self.results["Agent1 Wins"] += 1
-            elif winner == piece_to_color.get(self.agent2.piece):
-                self.results["Agent2 Wins"] += 1
-            else:
-                self.results["Draws"] += 1
-            #print(f"Agent 1: {self.agent1.__class__.__name__} ({self.agent1.piece})")
-            #print(f"Agent 2: {self.agent2.__class__.__name__} ({self.agent2.piece})")
-
-
-            print(f"Game {game_num+1}/{self.num_games} completed. Winner: {winner} ({winner_agent.__class__.__name__ if winner_agent else 'None'})")
+        if self.sink and "game" not in record:
+            self.sink.write({
+                "game": game_num,
+                "seed": self.seed + game_num,
+                "agent1": self.agent1.__class__.__name__,
+                "agent2": self.agent2.__class__.__name__,
+                **record,
+            })
+        if self.verbose:
+            print(f"Game {game_num+1}/{self.num_games} completed in {len(record['moves'])} moves. "
+                  f"Winner: {winner} ({winner_agent.__class__.__name__ if winner_agent else 'None'})")
 
     def display_results(self):
         """Print and visualize the performance metrics."""
@@ -110,6 +268,12 @@ class PerformanceEvaluator:
         print(f"Draws: {self.results['Draws']} ({draw_rate:.2f}%)")
         print(f"Avg. Game Length: {np.mean(self.results['Game Lengths']):.2f} moves")
         print(f"Avg. Execution Time: {np.mean(self.results['Execution Times']):.4f} sec")
+        for stats in self.move_stats or ():
+            summary = stats.summary()
+            latency = summary["latency"]
+            if latency["moves"]:
+                print(f"{summary['agent']} move latency: p50 {latency['p50_ms']:.2f} ms, "
+                      f"p95 {latency['p95_ms']:.2f} ms, p99 {latency['p99_ms']:.2f} ms")
 
         # Plot win/loss/draw rates
         labels = [f"{agent1_name} Wins", f"{agent2_name} Wins", "Draws"]
@@ -140,19 +304,24 @@ if __name__ == "__main__":
     random_agent = RandomAgent('●')
     smart_agent_game_one = SmartAgent('●')
     smart_agent_game_two = SmartAgent('○')
-    minimax_agent_one = MiniMaxAI('●', depth=6)
     minimax_agent_two = MiniMaxAI('○', depth=6)
-    ml_agent = MLAgent("ml_training/connect4_ml_agent.pkl", '○')
+    mcts_agent = MCTSAgent('●', playouts=1000)
+    ml_agent = MLAgent("ml_training/connect4_ml_agent.pkl", '●')  # Agent 1 always moves first
 
     # Run evaluations
-    evaluator1 = PerformanceEvaluator(random_agent, smart_agent_game_two, Connect4Game, num_games=500)
+    workers = os.cpu_count() or 1
+    evaluator1 = PerformanceEvaluator(random_agent, smart_agent_game_two, Connect4Game, num_games=500, workers=workers)
     evaluator1.run_games()
     evaluator1.display_results()
 
-    evaluator2 = PerformanceEvaluator(smart_agent_game_one, minimax_agent_two, Connect4Game, num_games=500)
+    evaluator2 = PerformanceEvaluator(smart_agent_game_one, minimax_agent_two, Connect4Game, num_games=500, workers=workers)
     evaluator2.run_games()
     evaluator2.display_results()
 
-    evaluator3 = PerformanceEvaluator(ml_agent,minimax_agent_one, Connect4Game, num_games=500)
+    evaluator3 = PerformanceEvaluator(ml_agent, minimax_agent_two, Connect4Game, num_games=500, workers=workers)
     evaluator3.run_games()
     evaluator3.display_results()
+
+    evaluator4 = PerformanceEvaluator(mcts_agent, minimax_agent_two, Connect4Game, num_games=100, workers=workers)
+    evaluator4.run_games()
+    evaluator4.display_results()
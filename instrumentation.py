@@ -0,0 +1,144 @@
+# Per-move latency and search statistics for any agent:
+#   agent = InstrumentedAgent(MiniMaxAI('●', time_limit_ms=100))
+#   ... play games with agent ...
+#   print(json.dumps(agent.stats.summary(), indent=2))
+# Agents that are not wrapped pay nothing, so leave them unwrapped when not measuring.
+import json
+import time
+
+import numpy as np
+
+from connect_4_game import ROWS, COLS
+
+# Game phases by the number of pieces on the board when the move is asked for
+PHASES = (("opening", 14), ("middlegame", 28), ("endgame", ROWS * COLS))
+# Histogram bucket edges in milliseconds; the last bucket holds everything slower
+HISTOGRAM_EDGES_MS = (0.1, 1, 5, 10, 50, 100, 500, 1000, 5000)
+# Counters read off an agent after every move when it has them, as (stats field, agent attribute)
+SEARCH_COUNTERS = (
+    ("nodes", "last_nodes_expanded"),
+    ("cutoffs", "last_cutoffs"),
+    ("tt_probes", "last_tt_probes"),
+    ("tt_hits", "last_tt_hits"),
+    ("playouts", "last_playouts"),
+)
+
+
+def phase_of(move_number):
+    for name, end in PHASES:
+        if move_number < end:
+            return name
+    return PHASES[-1][0]
+
+
+def latency_summary(latencies_ns):
+    """Count, mean, p50/p95/p99, max and histogram of a list of latencies, in milliseconds."""
+    if not latencies_ns:
+        return {"moves": 0}
+    ms = np.array(latencies_ns, dtype=np.float64) / 1e6
+    p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+    counts = np.bincount(np.searchsorted(HISTOGRAM_EDGES_MS, ms, side="right"),
+                         minlength=len(HISTOGRAM_EDGES_MS) + 1)
+    labels = [f"<{edge}" for edge in HISTOGRAM_EDGES_MS] + [f">={HISTOGRAM_EDGES_MS[-1]}"]
+    return {
+        "moves": len(ms),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "histogram_ms": dict(zip(labels, counts.tolist())),
+    }
+
+
+class MoveStats:
+    def __init__(self, name=""):
+        """Raw per-move samples of one agent, kept until summary() reduces them."""
+        self.name = name
+        self.latencies_ns = {phase: [] for phase, _ in PHASES}
+        self.counters = {field: 0 for field, _ in SEARCH_COUNTERS}
+        self.search_ns = {field: 0 for field, _ in SEARCH_COUNTERS}  # Time spent by moves reporting each counter
+
+    def add(self, latency_ns, move_number, agent):
+        """Records one move; agent is read for its last_* search counters, None to skip them."""
+        self.latencies_ns[phase_of(move_number)].append(latency_ns)
+        for field, attribute in SEARCH_COUNTERS:
+            value = getattr(agent, attribute, None)
+            if value is not None:
+                self.counters[field] += value
+                self.search_ns[field] += latency_ns
+
+    def merge(self, other):
+        """Adds the samples of another MoveStats, e.g. one sent back by a worker process."""
+        for phase, latencies in other.latencies_ns.items():
+            self.latencies_ns[phase].extend(latencies)
+        for field in self.counters:
+            self.counters[field] += other.counters[field]
+            self.search_ns[field] += other.search_ns[field]
+
+    def summary(self):
+        """Latency percentiles overall and per game phase, plus search rates where measured."""
+        everything = [latency for latencies in self.latencies_ns.values() for latency in latencies]
+        result = {
+            "agent": self.name,
+            "latency": latency_summary(everything),
+            "phases": {phase: latency_summary(latencies) for phase, latencies in self.latencies_ns.items()},
+        }
+        counters = self.counters
+        if self.search_ns["nodes"]:
+            result["nodes"] = counters["nodes"]
+            result["nodes_per_second"] = round(counters["nodes"] / (self.search_ns["nodes"] / 1e9), 1)
+        if self.search_ns["cutoffs"] and counters["nodes"]:
+            result["cutoff_rate"] = round(counters["cutoffs"] / counters["nodes"], 4)  # Cutoffs per node
+        if counters["tt_probes"]:
+            result["tt_hit_rate"] = round(counters["tt_hits"] / counters["tt_probes"], 4)
+        if self.search_ns["playouts"]:
+            result["playouts_per_second"] = round(counters["playouts"] / (self.search_ns["playouts"] / 1e9), 1)
+        return result
+
+
+class InstrumentedAgent:
+    def __init__(self, agent, name=None):
+        """Wraps an agent to time every get_move with perf_counter_ns.
+
+        Everything else (piece, reset, stop, last_* metrics, ...) is passed through, so the
+        wrapper stands in for the agent anywhere. get_moves, where the agent has it, is timed
+        as a whole and shared evenly between the games it served.
+        """
+        self.agent = agent
+        self.stats = MoveStats(name or agent.__class__.__name__)
+
+    def __getattr__(self, name):
+        if name == "agent":
+            raise AttributeError(name)  # Not set yet, e.g. while unpickling
+        if name == "get_moves" and hasattr(self.agent, "get_moves"):
+            return self._timed_get_moves
+        return getattr(self.agent, name)
+
+    def get_move(self, game):
+        move_number = len(game.history)
+        start = time.perf_counter_ns()
+        move = self.agent.get_move(game)
+        self.stats.add(time.perf_counter_ns() - start, move_number, self.agent)
+        return move
+
+    def _timed_get_moves(self, games):
+        move_numbers = [len(game.history) for game in games]
+        start = time.perf_counter_ns()
+        moves = self.agent.get_moves(games)
+        latency = (time.perf_counter_ns() - start) // max(len(games), 1)
+        for move_number in move_numbers:
+            self.stats.add(latency, move_number, None)  # last_* metrics would only describe the last game
+        return moves
+
+    def take_stats(self):
+        """Returns the samples collected so far and starts a fresh set."""
+        stats = self.stats
+        self.stats = MoveStats(stats.name)
+        return stats
+
+
+def write_summary(stats, path):
+    """Writes the summaries of a list of MoveStats to a JSON file."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([s.summary() for s in stats], f, indent=2)
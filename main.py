@@ -1,5 +1,9 @@
+import threading
+import traceback
+
 import pygame
 
+from bots.mcts_agent import MCTSAgent
 from bots.minimax_agent import MiniMaxAI
 from bots.ml_agent import MLAgent
 from bots.random_agent import RandomAgent
@@ -15,6 +19,9 @@ WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 BLUE = (0, 0, 255)
 HIGHLIGHT = (100, 100, 255)
+PIECE_COLORS = {1: (255, 0, 0), -1: (255, 255, 0)}  # By get_board_state value: red '●', yellow '○'
+FPS = 60
+FALL_SPEED = 500  # Pixels per second of a dropping piece
 path = "ml_training/connect4_ml_agent.pkl"
 class Connect4GUI:
     def __init__(self, player1, player2):
@@ -27,27 +34,56 @@ class Connect4GUI:
         self.game = Connect4Game()
         self.players = [player1, player2]
         self.hover_column = None
-
-    def draw_board(self):
-        self.screen.fill(BLACK)
-        if self.hover_column is not None:
-            pygame.draw.rect(self.screen, HIGHLIGHT,
-                             (self.hover_column * SQUARESIZE, 0, SQUARESIZE, (ROWS + 1) * SQUARESIZE))
-
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.Font(None, 36)
+        self.ai_thread = None  # Computes the current AI move so the event loop keeps running
+        self.ai_move = None
+        self.ai_error = None  # Exception raised by the AI's get_move, which ends the game
+        self.thinking_dots = None
+        self.background = self.render_background()  # Static board, drawn once and blitted from then on
+
+    def render_background(self):
+        """Draws the empty board with its holes onto a surface of its own."""
+        surface = pygame.Surface((self.width, self.height))
+        surface.fill(BLACK)
         for r in range(ROWS):
             for c in range(COLS):
-                pygame.draw.rect(self.screen, BLUE, (c * SQUARESIZE, (r+1) * SQUARESIZE, SQUARESIZE, SQUARESIZE))
-                pygame.draw.circle(self.screen, WHITE, (c * SQUARESIZE + SQUARESIZE//2, (r+1) * SQUARESIZE + SQUARESIZE//2), RADIUS)
+                pygame.draw.rect(surface, BLUE, (c * SQUARESIZE, (r+1) * SQUARESIZE, SQUARESIZE, SQUARESIZE))
+                pygame.draw.circle(surface, WHITE, (c * SQUARESIZE + SQUARESIZE//2, (r+1) * SQUARESIZE + SQUARESIZE//2), RADIUS)
+        return surface
+
+    def draw_piece(self, r, c, color):
+        pygame.draw.circle(self.screen, color, (c * SQUARESIZE + SQUARESIZE//2, (r+1) * SQUARESIZE + SQUARESIZE//2), RADIUS)
 
+    def draw_board(self):
+        """Redraws the whole window; only needed at the start."""
+        self.screen.blit(self.background, (0, 0))
+        state = self.game.get_board_state()
         for r in range(ROWS):
             for c in range(COLS):
-                if self.game.board[r][c] == '●':
-                    pygame.draw.circle(self.screen, (255, 0, 0), (c * SQUARESIZE + SQUARESIZE//2, (r+1) * SQUARESIZE + SQUARESIZE//2), RADIUS)
-                elif self.game.board[r][c] == '○':
-                    pygame.draw.circle(self.screen, (255, 255, 0), (c * SQUARESIZE + SQUARESIZE//2, (r+1) * SQUARESIZE + SQUARESIZE//2), RADIUS)
-
+                if state[r][c]:
+                    self.draw_piece(r, c, PIECE_COLORS[state[r][c]])
+        self.draw_top_row()
         pygame.display.update()
 
+    def draw_top_row(self):
+        """Redraws the row above the board with the hover highlight and returns its rect."""
+        area = pygame.Rect(0, 0, self.width, SQUARESIZE)
+        self.screen.blit(self.background, area, area)
+        if self.hover_column is not None:
+            self.screen.fill(HIGHLIGHT, (self.hover_column * SQUARESIZE, 0, SQUARESIZE, SQUARESIZE))
+        return area
+
+    def draw_column(self, col):
+        """Redraws one column from the cached background and returns its rect."""
+        area = pygame.Rect(col * SQUARESIZE, SQUARESIZE, SQUARESIZE, ROWS * SQUARESIZE)
+        self.screen.blit(self.background, area, area)
+        state = self.game.get_board_state()
+        for r in range(ROWS):
+            if state[r][col]:
+                self.draw_piece(r, col, PIECE_COLORS[state[r][col]])
+        return area
+
     def show_dialog(self, message):
         """Displays a game over message and waits for user input."""
         font = pygame.font.Font(None, 50)
@@ -73,49 +109,106 @@ class Connect4GUI:
         self.draw_board()
         running = True
 
-        while running:
+        while running and not self.game.game_over:
             current_player = self.players[self.game.turn]
+            human_turn = isinstance(current_player, HumanPlayer)
 
-            if isinstance(current_player, HumanPlayer):
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                    if event.type == pygame.MOUSEMOTION:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif human_turn and event.type == pygame.MOUSEMOTION:
+                    if event.pos[0] // SQUARESIZE != self.hover_column:
                         self.hover_column = event.pos[0] // SQUARESIZE
-                        self.draw_board()
-                    if event.type == pygame.MOUSEBUTTONDOWN:
-                        col = event.pos[0] // SQUARESIZE
-                        self.process_move(col)
-            else:
-                pygame.time.delay(500)  # AI move delay
-                col = current_player.get_move(self.game)
-                if col is not None:
+                        pygame.display.update(self.draw_top_row())
+                elif human_turn and event.type == pygame.MOUSEBUTTONDOWN:
+                    col = event.pos[0] // SQUARESIZE
                     self.process_move(col)
 
+            if running and not human_turn and not self.game.game_over:
+                if self.ai_thread is None:
+                    self.start_ai_move(current_player)
+                elif not self.ai_thread.is_alive():
+                    self.ai_thread = None
+                    if self.ai_error is not None:
+                        # Searching again would only fail the same way, every frame
+                        self.show_dialog(f"{current_player.__class__.__name__} failed")
+                        running = False
+                    elif self.ai_move is not None:
+                        self.process_move(self.ai_move)
+                else:
+                    self.draw_thinking_indicator()
+
+            self.clock.tick(FPS)
+
+        self.cancel_ai_move()
         pygame.quit()
 
+    def start_ai_move(self, player):
+        """Starts the AI's search on a copy of the game in a background thread."""
+        game = self.game.copy()  # The search plays moves on the board it gets, so keep the GUI's apart
+        self.ai_move = None
+        self.ai_error = None
+
+        def think():
+            try:
+                self.ai_move = player.get_move(game)
+            except Exception as error:
+                traceback.print_exc()
+                self.ai_error = error
+
+        self.ai_thread = threading.Thread(target=think, daemon=True)
+        self.ai_thread.start()
+
+    def cancel_ai_move(self):
+        """Stops a running search; agents without stop() finish in their daemon thread."""
+        if self.ai_thread is not None and self.ai_thread.is_alive():
+            player = self.players[self.game.turn]
+            if hasattr(player, "stop"):
+                player.stop()
+            self.ai_thread.join(timeout=1)
+        self.ai_thread = None
+
+    def draw_thinking_indicator(self):
+        """Animates "Thinking..." in the top row while the AI searches."""
+        dots = "." * (pygame.time.get_ticks() // 300 % 4)
+        if dots == self.thinking_dots:
+            return  # Nothing changed since the last frame
+        self.thinking_dots = dots
+        color = (255, 0, 0) if self.game.turn == 0 else (255, 255, 0)
+        area = pygame.Rect(0, 0, self.width, SQUARESIZE)
+        self.screen.fill(BLACK, area)
+        text_surface = self.font.render(f"Thinking{dots}", True, color)
+        self.screen.blit(text_surface, text_surface.get_rect(center=area.center))
+        pygame.display.update(area)
+
     def process_move(self, col):
         row = self.game.get_lowest_empty_row(col)
         if row is not None:
             piece = '●' if self.game.turn == 0 else '○'
+            self.thinking_dots = None
+            pygame.display.update(self.draw_top_row())  # Clears the thinking indicator
             self.animate_falling_piece(row, col, piece)
             result = self.game.drop_piece(col)
-            self.draw_board()
+            pygame.display.update(self.draw_column(col))
             if self.game.game_over:
-                winner_text = f"{'Player 1 (Red) Wins' if result == '●' else 'Player 2 (Yellow) Wins'}"
+                if result is True:
+                    winner_text = "Draw"  # Board filled up without a winner
+                else:
+                    winner_text = f"{'Player 1 (Red) Wins' if result == '●' else 'Player 2 (Yellow) Wins'}"
                 self.show_dialog(winner_text)
 
-
-
     def animate_falling_piece(self, row, col, piece):
+        """Drops the piece at FALL_SPEED, redrawing only its column each frame."""
         y_pos = SQUARESIZE // 2
-        color = (255, 0, 0) if piece == '●' else (255, 255, 0)
-        while y_pos < (row+1) * SQUARESIZE + SQUARESIZE//2:
-            self.draw_board()
-            pygame.draw.circle(self.screen, color, (col * SQUARESIZE + SQUARESIZE//2, y_pos), RADIUS)
-            pygame.display.update()
-            y_pos += 10
-            pygame.time.delay(20)
+        target = (row+1) * SQUARESIZE + SQUARESIZE//2
+        color = PIECE_COLORS[1] if piece == '●' else PIECE_COLORS[-1]
+        self.clock.tick(FPS)  # Start timing from now, not from the last frame of the main loop
+        while y_pos < target:
+            pygame.event.pump()  # Keep the window responsive during the animation
+            area = self.draw_column(col).union(self.draw_top_row())
+            pygame.draw.circle(self.screen, color, (col * SQUARESIZE + SQUARESIZE//2, int(y_pos)), RADIUS)
+            pygame.display.update(area)
+            y_pos += FALL_SPEED * self.clock.tick(FPS) / 1000
 
 import pygame
 
@@ -136,22 +229,28 @@ def show_selection_screen():
         "8. Minimax AI vs Smart AI",
         "9. Minimax AI vs Minimax AI",
         "10. Human vs ML Agent",
-        "11. ML Agent vs Minimax AI"
+        "11. ML Agent vs Minimax AI",
+        "12. Human vs MCTS AI",
+        "13. MCTS AI vs Minimax AI"
     ]
 
     selected_index = 0  # Track highlighted option
+    drawn_index = None  # Option highlighted on screen, to redraw only after a change
     BLACK, WHITE, YELLOW = (0, 0, 0), (255, 255, 255), (255, 255, 0)
+    clock = pygame.time.Clock()
 
     while True:
-        screen.fill(BLACK)
+        if selected_index != drawn_index:
+            screen.fill(BLACK)
 
-        for i, text in enumerate(options):
-            # Highlight selected option in yellow
-            color = YELLOW if i == selected_index else WHITE
-            text_surface = font.render(text, True, color)
-            screen.blit(text_surface, (50, 50 + i * 40))
+            for i, text in enumerate(options):
+                # Highlight selected option in yellow
+                color = YELLOW if i == selected_index else WHITE
+                text_surface = font.render(text, True, color)
+                screen.blit(text_surface, (50, 30 + i * 34))  # Tight enough for every option to fit
 
-        pygame.display.update()
+            pygame.display.update()
+            drawn_index = selected_index
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -166,6 +265,8 @@ def show_selection_screen():
                 elif event.key == pygame.K_RETURN:  # Confirm selection
                     return selected_index + 1  # Return selection (1-based index)
 
+        clock.tick(FPS)
+
 
 if __name__ == "__main__":
     mode = show_selection_screen()
@@ -203,6 +304,12 @@ if __name__ == "__main__":
     elif mode == 11:
         player1 = MLAgent(path,'●')
         player2 = MiniMaxAI('○')
+    elif mode == 12:
+        player1 = HumanPlayer('●')
+        player2 = MCTSAgent('○', time_limit_ms=1000)
+    elif mode == 13:
+        player1 = MCTSAgent('●', time_limit_ms=1000)
+        player2 = MiniMaxAI('○')
 
 
 game_gui = Connect4GUI(player1, player2)
@@ -1,31 +1,20 @@
-import pandas as pd
 import joblib
 import gc
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score
 
-# Load dataset
-url = "connect-4.data"
-column_names = [f"col_{i}" for i in range(42)] + ["outcome"]  # Ensure correct column name
+from dataset import load_uci_dataset
 
-df = pd.read_csv(url, names=column_names, dtype="category")
-
-# Map board values (fixing FutureWarning)
-mapping = {'b': 0, 'x': 1, 'o': -1}
-for col in df.columns[:-1]:
-    df[col] = df[col].astype(str).map(mapping).astype("int8")  # Convert to str before mapping
-
-# Map outcomes (fixing the error)
-outcome_mapping = {'win': 1, 'loss': -1, 'draw': 0}
-df["outcome"] = df["outcome"].astype(str).map(outcome_mapping).astype("int8")  # Explicit mapping
+# Load dataset (boards as int8 1 / -1 / 0, outcomes as 1 / 0 / -1 for win / draw / loss)
+X, y = load_uci_dataset()
 
 # Train-test split
 X_train, X_test, y_train, y_test = train_test_split(
-    df.iloc[:, :-1], df["outcome"], test_size=0.2, random_state=42
+    X, y, test_size=0.2, random_state=42
 )
 
-del df  # Free unused memory
+del X, y  # Free unused memory
 gc.collect()
 
 # Train Random Forest Classifier
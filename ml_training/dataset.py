@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "datasets", "connect+4")
+DATASET_PATH = os.path.join(DATASET_DIR, "connect-4.data.Z")
+NUM_FEATURES = 42
+
+# Byte -> value lookup tables for the board symbols and the first letter of the outcome
+CELL_VALUES = np.zeros(256, dtype=np.int8)
+CELL_VALUES[ord('x')], CELL_VALUES[ord('o')], CELL_VALUES[ord('b')] = 1, -1, 0
+OUTCOME_VALUES = {ord('w'): 1, ord('l'): -1, ord('d'): 0}
+
+
+def iter_lzw(path, chunk_size=1 << 16, block_size=1 << 16):
+    """Decompresses a Unix compress (.Z) file, yielding the output in chunks of bytes.
+
+    Follows ncompress exactly, including its habit of skipping to the end of the current
+    group of 8 codes whenever the code width grows or the table is cleared. The input is
+    read block_size bytes at a time, so only the code table grows with the file.
+    """
+    with open(path, "rb") as f:
+        yield from _decode_lzw(f, path, chunk_size, block_size)
+
+
+def _decode_lzw(f, path, chunk_size, block_size):
+    header = f.read(3)
+    if header[:2] != b"\x1f\x9d" or len(header) < 3:
+        raise ValueError(f"{path} is not a compress (.Z) file")
+    max_bits = header[2] & 0x1f
+    block_mode = header[2] & 0x80
+    max_max_code = 1 << max_bits
+
+    data = b""  # Input not yet consumed
+    base = 3 * 8  # Bit position of data[0] in the file
+    eof = False
+    pos = seg_start = 3 * 8  # Bit positions; group alignment is measured from seg_start
+    n_bits = 9
+    max_code = (1 << n_bits) - 1
+    table = [bytes([i]) for i in range(256)]
+    if block_mode:
+        table.append(b"")  # Code 256 is CLEAR
+    prev = None
+    out = []
+    out_size = 0
+
+    while True:
+        # A code of up to 16 bits at any bit offset spans at most 3 bytes
+        while not eof and len(data) - ((pos - base) >> 3) < 3:
+            drop = min((pos - base) >> 3, len(data))
+            block = f.read(block_size)
+            eof = not block
+            data = data[drop:] + block
+            base += drop * 8
+        if pos + n_bits > base + len(data) * 8:
+            break  # Only padding is left
+
+        if len(table) > max_code:
+            group = n_bits * 8
+            pos = seg_start + -(-(pos - seg_start) // group) * group  # Skip to the end of the group
+            seg_start = pos
+            n_bits += 1
+            max_code = max_max_code if n_bits == max_bits else (1 << n_bits) - 1
+            continue
+
+        i = (pos - base) >> 3
+        code = (int.from_bytes(data[i:i + 3], "little") >> (pos & 7)) & ((1 << n_bits) - 1)
+        pos += n_bits
+
+        if prev is None:
+            entry = table[code]
+        elif code == 256 and block_mode:
+            group = n_bits * 8
+            pos = seg_start + -(-(pos - seg_start) // group) * group
+            seg_start = pos
+            n_bits = 9
+            max_code = (1 << n_bits) - 1
+            del table[256:]  # The next code re-adds slot 256, which is never referenced
+            continue
+        else:
+            if code < len(table):
+                entry = table[code]
+            elif code == len(table):
+                entry = prev + prev[:1]
+            else:
+                raise ValueError(f"Corrupt compress data in {path}")
+            if len(table) < max_max_code:
+                table.append(prev + entry[:1] if len(table) != 256 else b"")
+
+        prev = entry
+        out.append(entry)
+        out_size += len(entry)
+        if out_size >= chunk_size:
+            yield b"".join(out)
+            out, out_size = [], 0
+
+    if out:
+        yield b"".join(out)
+
+
+def iter_lines(chunks):
+    """Splits a stream of byte chunks into lines."""
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def parse_uci(lines):
+    """Parses 'x,o,b,...,win' lines into an (n, 43) int8 matrix: 42 cells then the outcome."""
+    boards = bytearray()
+    outcomes = bytearray()
+    for line in lines:
+        line = line.strip()
+        if line:
+            boards += line[0:2 * NUM_FEATURES - 1:2]  # Every other byte skips the commas
+            outcomes.append(OUTCOME_VALUES[line[2 * NUM_FEATURES]] & 0xff)
+    data = np.empty((len(outcomes), NUM_FEATURES + 1), dtype=np.int8)
+    data[:, :NUM_FEATURES] = CELL_VALUES[np.frombuffer(bytes(boards), dtype=np.uint8)].reshape(-1, NUM_FEATURES)
+    data[:, NUM_FEATURES] = np.frombuffer(bytes(outcomes), dtype=np.int8)
+    return data
+
+
+def load_uci_dataset(path=DATASET_PATH, use_cache=True):
+    """Returns (X, y) for the UCI connect-4 data as int8 arrays.
+
+    The first call parses the .Z (or plain) file in one pass and saves the result as a .npy
+    next to it; later calls memory-map that file. X rows use the UCI cell order, the same
+    layout as Connect4Game.get_board_state(uci_features=True); y is 1 / 0 / -1 for a
+    win / draw / loss of the first player.
+    """
+    cache_path = (path[:-2] if path.endswith(".Z") else path).rsplit(".", 1)[0] + ".npy"
+    if use_cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        data = np.load(cache_path, mmap_mode="r")
+    else:
+        if path.endswith(".Z"):
+            data = parse_uci(iter_lines(iter_lzw(path)))
+        else:
+            with open(path, "rb") as f:
+                data = parse_uci(f)
+        if use_cache:
+            np.save(cache_path, data)
+            data = np.load(cache_path, mmap_mode="r")
+    return data[:, :NUM_FEATURES], data[:, NUM_FEATURES]
@@ -0,0 +1,57 @@
+# Run from the repository root: python -m ml_training.export_model ml_training/connect4_ml_agent.pkl
+import argparse
+import json
+
+import joblib
+import numpy as np
+
+from bots.forest_predictor import node_dtype
+
+
+def export_forest(model, path):
+    """Writes a fitted tree ensemble as one flat .npy node array plus a small .json header.
+
+    MLAgent memory-maps the result through bots.forest_predictor.FlatForest, which needs
+    neither scikit-learn nor unpickling at startup.
+    """
+    estimators = getattr(model, "estimators_", [model])
+    if not hasattr(estimators[0], "tree_"):
+        raise ValueError(f"Only decision trees and forests can be exported, not {type(model).__name__}")
+
+    n_classes = len(model.classes_)
+    nodes = np.empty(sum(e.tree_.node_count for e in estimators), dtype=node_dtype(n_classes))
+    roots = []
+    offset = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        end = offset + tree.node_count
+        leaf = tree.children_left < 0
+        nodes["feature"][offset:end] = np.where(leaf, -1, tree.feature)
+        nodes["threshold"][offset:end] = tree.threshold
+        nodes["left"][offset:end] = np.where(leaf, -1, tree.children_left + offset)
+        nodes["right"][offset:end] = np.where(leaf, -1, tree.children_right + offset)
+        value = tree.value[:, 0, :]
+        nodes["value"][offset:end] = value / value.sum(axis=1, keepdims=True)
+        roots.append(offset)
+        offset = end
+
+    np.save(path, nodes)
+    header = {
+        "roots": roots,
+        "classes": [int(c) for c in model.classes_],
+        "n_features": int(model.n_features_in_),
+        "max_depth": int(max(e.tree_.max_depth for e in estimators)),
+    }
+    with open(path[:-4] + ".json", "w") as f:
+        json.dump(header, f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a pickled forest to the flat NumPy format.")
+    parser.add_argument("model", help="Path of the joblib .pkl model")
+    parser.add_argument("--out", help="Output .npy path; defaults to the model path with .npy")
+    args = parser.parse_args()
+
+    out = args.out or args.model.rsplit(".", 1)[0] + ".npy"
+    export_forest(joblib.load(args.model), out)
+    print(f"Exported {args.model} to {out}")
@@ -1,10 +1,13 @@
 import pandas as pd
 
-# Load the dataset from local file
-file_path = "connect-4.data"  # Update this with the correct path
-column_names = [f"col_{i}" for i in range(42)] + ["outcome"]
+from dataset import load_uci_dataset
 
-df = pd.read_csv(file_path, names=column_names)
+# Load the dataset straight from the compressed file shipped in datasets/ (cached after the first run)
+X, y = load_uci_dataset()
+column_names = [f"col_{i}" for i in range(42)]
+
+df = pd.DataFrame(X, columns=column_names)
+df["outcome"] = y
 
 # Show first few rows
 print(df.head())
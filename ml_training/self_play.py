@@ -0,0 +1,155 @@
+# Run from the repository root: python -m ml_training.self_play --games 10000 --workers 8
+import argparse
+import glob
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bots.minimax_agent import MiniMaxAI, WIN_SCORE
+from bots.random_agent import RandomAgent
+from bots.smart_agent import SmartAgent
+from connect_4_game import Connect4Game, ROWS, H1, PIECES, canonical_hash
+from ml_training.dataset import NUM_FEATURES
+
+DEFAULT_OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "datasets", "self_play")
+AGENT_NAMES = ("minimax", "smart", "random")
+
+
+def keys_from_rows(rows):
+    """Rebuilds the position keys of stored dataset rows (UCI cell order)."""
+    bit_values = [1 << (i // ROWS * H1 + i % ROWS) for i in range(NUM_FEATURES)]
+    keys = []
+    for row in rows:
+        bitboards = [0, 0]
+        for i in np.flatnonzero(row[:NUM_FEATURES]):
+            bitboards[0 if row[i] == 1 else 1] |= bit_values[i]
+        keys.append(canonical_hash(bitboards))  # Same key as Connect4Game.canonical_key gives
+    return keys
+
+
+def make_agent(name, piece, depth):
+    if name == "minimax":
+        return MiniMaxAI(piece, depth=depth)
+    if name == "smart":
+        return SmartAgent(piece)
+    return RandomAgent(piece)
+
+
+def play_labelled_game(seed, agent_names, agent_depth, label_depth, max_opening_plies):
+    """Plays one self-play game and returns (key, row) for every position in it.
+
+    A row holds the 42 cells in UCI order followed by the label from the first player's point
+    of view: the search result when the label search proves a win or loss, or the solver
+    proves any result including a draw, otherwise the final result of the game.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    players = [make_agent(rng.choice(agent_names), piece, agent_depth) for piece in PIECES]
+    labellers = [MiniMaxAI(piece, depth=label_depth) for piece in PIECES]
+
+    game = Connect4Game()
+    for _ in range(rng.randint(0, max_opening_plies)):  # Random openings keep games apart
+        game.drop_piece(rng.choice(game.get_valid_columns()))
+
+    positions = []
+    while not game.game_over:
+        labeller = labellers[game.turn]
+        labeller.get_move(game)
+        proven = None
+        if labeller.last_exact and labeller.last_score == 0:
+            proven = 0  # A solved draw; only wins and losses show in the score
+        elif abs(labeller.last_score) >= WIN_SCORE:
+            proven = 1 if (labeller.last_score > 0) == (game.turn == 0) else -1
+        positions.append((game.canonical_key()[0], game.get_board_state(uci_features=True).copy(), proven))
+        game.drop_piece(players[game.turn].get_move(game))
+
+    if game.check_winner_piece(PIECES[0]):
+        result = 1
+    elif game.check_winner_piece(PIECES[1]):
+        result = -1
+    else:
+        result = 0
+    rows = []
+    for key, cells, proven in positions:
+        row = np.empty(NUM_FEATURES + 1, dtype=np.int8)
+        row[:NUM_FEATURES] = cells
+        row[NUM_FEATURES] = result if proven is None else proven
+        rows.append((key, row))
+    return rows
+
+
+def _play_games(args):
+    seeds, agent_names, agent_depth, label_depth, max_opening_plies = args
+    return [row for seed in seeds
+            for row in play_labelled_game(seed, agent_names, agent_depth, label_depth, max_opening_plies)]
+
+
+class ShardWriter:
+    def __init__(self, out_dir, shard_size):
+        """Streams dataset rows to numbered .npy shards of shard_size rows each."""
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        os.makedirs(out_dir, exist_ok=True)
+        self.shard_paths = sorted(glob.glob(os.path.join(out_dir, "shard-*.npy")))
+        self.next_index = len(self.shard_paths)
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            path = os.path.join(self.out_dir, f"shard-{self.next_index:05d}.npy")
+            np.save(path, np.stack(self.rows))
+            self.shard_paths.append(path)
+            self.next_index += 1
+            self.rows = []
+
+
+def generate(num_games, out_dir=DEFAULT_OUT_DIR, workers=1, shard_size=100000, seed=0,
+             agent_names=AGENT_NAMES, agent_depth=4, label_depth=4, max_opening_plies=6, games_per_task=20):
+    """Plays num_games self-play games and streams every new position to shards in out_dir.
+
+    Positions are deduplicated by a mirror-invariant key, including against the shards
+    already in out_dir, so repeated runs keep adding to the same dataset.
+    """
+    writer = ShardWriter(out_dir, shard_size)
+    seen = set()
+    for path in writer.shard_paths:
+        seen.update(keys_from_rows(np.load(path, mmap_mode="r")))
+
+    seeds = list(range(seed, seed + num_games))
+    tasks = [(seeds[i:i + games_per_task], agent_names, agent_depth, label_depth, max_opening_plies)
+             for i in range(0, len(seeds), games_per_task)]
+    added = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows in pool.map(_play_games, tasks):
+            for key, row in rows:
+                if key not in seen:
+                    seen.add(key)
+                    writer.write(row)
+                    added += 1
+    writer.flush()
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a self-play Connect 4 dataset.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--agents", default=",".join(AGENT_NAMES), help="Comma-separated: minimax, smart, random")
+    parser.add_argument("--agent-depth", type=int, default=4)
+    parser.add_argument("--label-depth", type=int, default=4)
+    args = parser.parse_args()
+
+    added = generate(args.games, args.out, args.workers, args.shard_size, args.seed,
+                     tuple(args.agents.split(",")), args.agent_depth, args.label_depth)
+    print(f"Added {added} new positions to {args.out}")
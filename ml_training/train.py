@@ -0,0 +1,182 @@
+# Run from the repository root: python -m ml_training.train --learner sgd --resume
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+
+from ml_training.dataset import DATASET_PATH, NUM_FEATURES, load_uci_dataset
+from ml_training.self_play import DEFAULT_OUT_DIR as SELF_PLAY_DIR
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+CLASSES = np.array([-1, 0, 1], dtype=np.int8)  # Loss, draw, win for the first player
+FEATURE_LAYOUT = {
+    "features": NUM_FEATURES,
+    "order": "UCI: a1..a6, b1..b6, ..., g1..g6 (column by column, bottom to top)",
+    "values": {"first player": 1, "second player": -1, "empty": 0},
+    "dtype": "int8",
+}
+HOLDOUT_EVERY = 10  # Every 10th row of every source file is kept back for the accuracy check
+MODEL_PATTERN = re.compile(r"connect4-v(\d+)\.pkl$")
+
+
+def default_sources():
+    """The UCI data (cached as .npy) plus any self-play shards."""
+    load_uci_dataset()  # Builds the .npy cache if it is missing
+    uci_cache = DATASET_PATH[:-2].rsplit(".", 1)[0] + ".npy"
+    return [uci_cache] + sorted(glob.glob(os.path.join(SELF_PLAY_DIR, "shard-*.npy")))
+
+
+def dataset_hash(paths):
+    """SHA-256 over the names and contents of every source file, read in blocks."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    """SHA-256 of one source file's contents, so a resumed run can tell which sources it has seen."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_chunks(paths, chunk_size):
+    """Yields (path, first row index, (n, 43) chunk) from memory-mapped int8 files; only one
+    chunk is in memory at a time."""
+    for path in paths:
+        data = np.load(path, mmap_mode="r")
+        for start in range(0, len(data), chunk_size):
+            yield path, start, np.array(data[start:start + chunk_size])
+
+
+def latest_version(models_dir=MODELS_DIR):
+    """Returns (version, model path) of the newest artifact, or (0, None)."""
+    versions = []
+    for path in glob.glob(os.path.join(models_dir, "connect4-v*.pkl")):
+        match = MODEL_PATTERN.search(path)
+        if match:
+            versions.append((int(match.group(1)), path))
+    return max(versions) if versions else (0, None)
+
+
+def new_model(learner):
+    if learner == "sgd":
+        return SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)
+    return RandomForestClassifier(n_estimators=0, warm_start=True, max_depth=10, min_samples_split=5,
+                                  max_features="sqrt", random_state=42, n_jobs=-1)
+
+
+def train_chunk(model, learner, X, y, trees_per_chunk):
+    """Updates the model with one chunk; returns False if the chunk had to be skipped."""
+    if learner == "sgd":
+        model.partial_fit(X, y, classes=CLASSES)
+        return True
+    # New trees are added on top of the old ones; they must see the same classes to be combined
+    if not np.array_equal(np.unique(y), CLASSES):
+        return False
+    model.n_estimators += trees_per_chunk
+    model.fit(X, y)
+    return True
+
+
+def train(sources=None, learner="sgd", chunk_size=50000, trees_per_chunk=10, resume=False,
+          models_dir=MODELS_DIR, seed=42):
+    """Trains on every source chunk by chunk and saves the next versioned model artifact."""
+    sources = sources or default_sources()
+    version, parent_path = latest_version(models_dir)
+    parent_meta = None
+    if resume and parent_path:
+        model = joblib.load(parent_path)
+        with open(parent_path[:-4] + ".json") as f:
+            parent_meta = json.load(f)
+        if parent_meta["learner"] != learner:
+            raise ValueError(f"Cannot resume a {parent_meta['learner']} model as {learner}")
+    else:
+        model = new_model(learner)
+
+    # Sources the parent model was trained on, by content, are only read for their held-out rows
+    hashes = {path: file_hash(path) for path in sources}
+    trained_hashes = dict(parent_meta.get("source_hashes", {})) if parent_meta else {}
+    new_sources = {path for path in sources if hashes[path] not in trained_hashes.values()}
+    if not new_sources:
+        raise ValueError(f"Model v{version:04d} was already trained on every source; nothing to resume with")
+
+    rng = np.random.default_rng(seed)
+    holdout_X, holdout_y = [], []
+    rows = skipped = 0
+    start = time.time()
+    for path, first_row, chunk in iter_chunks(sources, chunk_size):
+        # Held-out rows are picked by position in the file, so no chunk size ever trains on them
+        held_out = (first_row + np.arange(len(chunk))) % HOLDOUT_EVERY == 0
+        holdout_X.append(chunk[held_out, :NUM_FEATURES])
+        holdout_y.append(chunk[held_out, NUM_FEATURES])
+        if path not in new_sources:
+            continue
+        train_rows = chunk[~held_out]
+        rng.shuffle(train_rows)
+        if train_chunk(model, learner, train_rows[:, :NUM_FEATURES], train_rows[:, NUM_FEATURES], trees_per_chunk):
+            rows += len(train_rows)
+        else:
+            skipped += 1
+        print(f"{rows} rows trained, {skipped} chunks skipped, {time.time() - start:.1f}s")
+    if rows == 0:
+        # Nothing to score or save; a forest that never saw a chunk is not even fitted
+        raise ValueError(f"No rows were trained ({skipped} chunks skipped). Forest chunks need every "
+                         f"class {CLASSES.tolist()}; try a larger chunk_size or more sources.")
+
+    holdout_X, holdout_y = np.concatenate(holdout_X), np.concatenate(holdout_y)
+    accuracy = float((model.predict(holdout_X) == holdout_y).mean())
+
+    os.makedirs(models_dir, exist_ok=True)
+    version += 1
+    model_path = os.path.join(models_dir, f"connect4-v{version:04d}.pkl")
+    joblib.dump(model, model_path, compress=3)
+    metadata = {
+        "version": version,
+        "parent_version": parent_meta["version"] if parent_meta else None,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "learner": learner,
+        "params": {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, type(None)))},
+        "feature_layout": FEATURE_LAYOUT,
+        "classes": [int(c) for c in model.classes_],
+        "training_sources": [os.path.relpath(path) for path in sources],
+        "training_set_hash": dataset_hash(sources),
+        # Every source trained into this model or its ancestors, by content
+        "source_hashes": {**trained_hashes, **{os.path.relpath(path): hashes[path] for path in new_sources}},
+        "rows_trained": rows + (parent_meta["rows_trained"] if parent_meta else 0),
+        "holdout_rows": int(len(holdout_y)),
+        "holdout_accuracy": accuracy,
+    }
+    with open(model_path[:-4] + ".json", "w") as f:
+        json.dump(metadata, f, indent=2)
+    return model_path, metadata
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the Connect 4 outcome model chunk by chunk.")
+    parser.add_argument("--data", nargs="*", help="(n, 43) int8 .npy files; defaults to UCI + self-play shards")
+    parser.add_argument("--learner", choices=("sgd", "forest"), default="sgd",
+                        help="sgd uses partial_fit; forest adds warm-started trees per chunk")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--trees-per-chunk", type=int, default=10)
+    parser.add_argument("--resume", action="store_true", help="Continue from the latest model artifact")
+    parser.add_argument("--models-dir", default=MODELS_DIR)
+    args = parser.parse_args()
+
+    model_path, metadata = train(args.data, args.learner, args.chunk_size, args.trees_per_chunk,
+                                 args.resume, args.models_dir)
+    print(f"Saved {model_path} (holdout accuracy {metadata['holdout_accuracy']:.4f})")
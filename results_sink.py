@@ -0,0 +1,93 @@
+import csv
+import json
+import os
+
+# length goes last so a row cut short by an interrupted run fails the length check on reading.
+# pairing is only set by tournaments, where game numbers restart for every pairing.
+CSV_FIELDS = ["game", "pairing", "seed", "agent1", "agent2", "winner", "duration", "moves",
+              "move_latency_ms", "search_metrics", "length"]
+
+
+class ResultsSink:
+    def __init__(self, path, file_format=None):
+        """Appends one compact record per game to a JSON Lines (.jsonl) or CSV (.csv) file.
+
+        Every record is flushed as soon as it is written, so the file can be tailed while a
+        tournament runs and read back with read_records to resume or analyse it.
+        """
+        self.path = path
+        self.file_format = file_format or ("csv" if path.endswith(".csv") else "jsonl")
+        if self.file_format not in ("jsonl", "csv"):
+            raise ValueError(f"Unknown results format: {self.file_format}")
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        if not new_file:
+            with open(path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    self.file.write("\n")  # Close off a line cut short by an interrupted run
+        if self.file_format == "csv":
+            fieldnames = CSV_FIELDS
+            if not new_file:
+                with open(path, newline="", encoding="utf-8") as existing:
+                    fieldnames = next(csv.reader(existing))  # Keep the columns of an older file
+            self.writer = csv.DictWriter(self.file, fieldnames=fieldnames)
+            if new_file:
+                self.writer.writeheader()
+
+    def write(self, record):
+        """Writes one game record."""
+        if self.file_format == "jsonl":
+            self.file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        else:
+            row = dict(record)
+            row["winner"] = record["winner"] or ""
+            row["moves"] = "".join(str(move) for move in record["moves"])
+            row["move_latency_ms"] = " ".join(f"{ms:.3f}" for ms in record["move_latency_ms"])
+            row["search_metrics"] = " ".join(f"{depth}:{nodes}" for depth, nodes in record["search_metrics"])
+            self.writer.writerow({field: row.get(field, "") for field in self.writer.fieldnames})
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_records(path):
+    """Yields the game records stored by ResultsSink, in the order they were written."""
+    if not os.path.exists(path):
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                try:
+                    record = {
+                        "game": int(row["game"]),
+                        "pairing": row.get("pairing") or None,
+                        "seed": int(row["seed"]),
+                        "agent1": row["agent1"],
+                        "agent2": row["agent2"],
+                        "winner": row["winner"] or None,
+                        "length": int(row["length"]),
+                        "duration": float(row["duration"]),
+                        "moves": [int(move) for move in row["moves"]],
+                        "move_latency_ms": [float(ms) for ms in row["move_latency_ms"].split()],
+                        "search_metrics": [tuple(int(x) for x in pair.split(":")) for pair in row["search_metrics"].split()],
+                    }
+                except (TypeError, ValueError):
+                    continue  # A row cut short by an interrupted run
+                if len(record["moves"]) == record["length"]:
+                    yield record
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by an interrupted run
+                    yield record
@@ -0,0 +1,263 @@
+# Run from the repository root:
+#   python tournament.py random smart minimax:depth=2 minimax:depth=4 --games 100 --workers 4
+import argparse
+import itertools
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from bots.mcts_agent import MCTSAgent
+from bots.minimax_agent import MiniMaxAI
+from bots.ml_agent import MLAgent
+from bots.random_agent import RandomAgent
+from bots.smart_agent import SmartAgent
+from connect_4_game import Connect4Game, PIECES
+from evaluate_agents import play_game
+from results_sink import ResultsSink, read_records
+
+AGENT_CLASSES = {
+    "random": RandomAgent,
+    "smart": SmartAgent,
+    "minimax": MiniMaxAI,
+    "mcts": MCTSAgent,
+    "ml": MLAgent,
+}
+INITIAL_RATING = 1500
+K_FACTOR = 16
+
+
+def parse_spec(spec):
+    """Splits "minimax:depth=4,time_limit_ms=100" into the agent name and its parameters."""
+    name, _, params = spec.partition(":")
+    if name not in AGENT_CLASSES:
+        raise ValueError(f"Unknown agent {name!r}, expected one of {', '.join(AGENT_CLASSES)}")
+    kwargs = {}
+    for param in filter(None, params.split(",")):
+        key, _, value = param.partition("=")
+        try:
+            kwargs[key] = json.loads(value)  # Numbers, booleans and null
+        except ValueError:
+            kwargs[key] = value  # Anything else is a string, e.g. a model path
+    return name, kwargs
+
+
+def build_agent(spec, piece):
+    name, kwargs = parse_spec(spec)
+    return AGENT_CLASSES[name](piece=piece, **kwargs)
+
+
+def expected_score(rating, opponent_rating):
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def is_settled(pairing, min_games, z):
+    """Whether the score's confidence interval no longer contains an even result.
+
+    The interval uses the observed spread of win/draw/loss results, so drawish pairings
+    settle as quickly as decisive ones.
+    """
+    n = pairing["games"]
+    if n < min_games:
+        return False
+    mean = pairing["score"] / n
+    variance = (pairing["wins"] + 0.25 * pairing["draws"]) / n - mean ** 2
+    if variance <= 0:
+        return True  # Every game ended the same way
+    return abs(mean - 0.5) > z * math.sqrt(variance / n)
+
+
+# Agents built once per pool worker and spec, so e.g. MLAgent loads its model once per process
+_worker_agents = {}
+
+
+def _play_pairing_game(task):
+    """Plays game k of a pairing; returns the result for the pairing's first agent (1, 0.5 or 0)."""
+    spec_a, spec_b, k, seed = task
+    # Colours alternate, and both games of a colour-swapped pair share a seed
+    first, second = (spec_a, spec_b) if k % 2 == 0 else (spec_b, spec_a)
+    agents = []
+    for spec, piece in ((first, PIECES[0]), (second, PIECES[1])):
+        if (spec, piece) not in _worker_agents:
+            _worker_agents[(spec, piece)] = build_agent(spec, piece)
+        agents.append(_worker_agents[(spec, piece)])
+    record = play_game(agents[0], agents[1], Connect4Game, seed)
+    if record["winner"] is None:
+        return 0.5, record
+    a_won = (record["winner"] == PIECES[0]) == (k % 2 == 0)
+    return (1.0 if a_won else 0.0), record
+
+
+class Tournament:
+    def __init__(self, specs, games_per_pairing=100, workers=1, seed=0, state_path="tournament.json",
+                 results_path=None, round_games=10, min_games=20, z=2.58):
+        """Round-robin between agent specs, with colours swapped every other game.
+
+        Every pairing plays round_games games per round; after each round ratings are
+        updated in a fixed order and the state is saved, so results do not depend on the
+        number of workers and an interrupted run resumes from the last finished round.
+        A pairing stops early once is_settled finds its result clear at the given z.
+        """
+        if len(set(specs)) != len(specs):
+            raise ValueError("Agent specs must be unique")
+        for spec in specs:
+            parse_spec(spec)  # Fail before any game is played
+        self.specs = list(specs)
+        self.games_per_pairing = games_per_pairing
+        self.workers = workers
+        self.seed = seed
+        self.state_path = state_path
+        self.results_path = results_path
+        self.round_games = round_games + round_games % 2  # Even, so colours stay balanced
+        self.min_games = min_games
+        self.z = z
+        self.state = self.load_state()
+
+    def new_state(self):
+        return {
+            "specs": self.specs,
+            "seed": self.seed,
+            "ratings": {spec: INITIAL_RATING for spec in self.specs},
+            "pairings": {
+                f"{a} vs {b}": {"a": a, "b": b, "games": 0, "score": 0.0, "wins": 0, "draws": 0,
+                                "losses": 0, "settled": False}
+                for a, b in itertools.combinations(self.specs, 2)
+            },
+        }
+
+    def load_state(self):
+        """Continues a saved tournament with the same agents and seed, or starts a new one."""
+        if self.state_path and os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state["specs"] == self.specs and state["seed"] == self.seed:
+                return state
+            raise ValueError(f"{self.state_path} belongs to a different tournament")
+        return self.new_state()
+
+    def save_state(self):
+        """Writes the state through a temporary file, so a crash never leaves it half written."""
+        if not self.state_path:
+            return
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def active_pairings(self):
+        return [p for p in self.state["pairings"].values()
+                if not p["settled"] and p["games"] < self.games_per_pairing]
+
+    def add_result(self, pairing, score):
+        """Counts one game and moves both ratings by the usual Elo update."""
+        pairing["games"] += 1
+        pairing["score"] += score
+        pairing["wins" if score == 1 else "draws" if score == 0.5 else "losses"] += 1
+        ratings = self.state["ratings"]
+        a, b = pairing["a"], pairing["b"]
+        change = K_FACTOR * (score - expected_score(ratings[a], ratings[b]))
+        ratings[a] += change
+        ratings[b] -= change
+
+    def trim_results(self):
+        """Drops recorded games the saved state does not count, so a round cut short by an
+        interruption is not recorded twice when it is played again. Records of other pairings
+        or without one (e.g. from PerformanceEvaluator) are left alone.
+        """
+        if not os.path.exists(self.results_path):
+            return
+        pairings = self.state["pairings"]
+        records = list(read_records(self.results_path))
+        kept, seen = [], set()
+        for record in records:
+            pairing = pairings.get(record.get("pairing"))
+            game_id = (record.get("pairing"), record["game"])
+            if pairing is None or (record["game"] < pairing["games"] and game_id not in seen):
+                seen.add(game_id)
+                kept.append(record)
+        if len(kept) == len(records):
+            return
+        file_format = "csv" if self.results_path.endswith(".csv") else "jsonl"
+        tmp_path = self.results_path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        with ResultsSink(tmp_path, file_format) as sink:
+            for record in kept:
+                sink.write(record)
+        os.replace(tmp_path, self.results_path)
+
+    def run(self):
+        """Plays rounds until every pairing is settled or has played games_per_pairing games."""
+        if self.results_path:
+            self.trim_results()
+        sink = ResultsSink(self.results_path) if self.results_path else None
+        pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        try:
+            while self.active_pairings():
+                tasks, owners = [], []
+                for pairing in self.active_pairings():
+                    start = pairing["games"]
+                    for k in range(start, min(start + self.round_games, self.games_per_pairing)):
+                        tasks.append((pairing["a"], pairing["b"], k, self.seed + k // 2))
+                        owners.append(pairing)
+                # Results come back in task order, whichever worker finished first
+                results = pool.map(_play_pairing_game, tasks) if pool else map(_play_pairing_game, tasks)
+                for task, pairing, (score, record) in zip(tasks, owners, results):
+                    self.add_result(pairing, score)
+                    if sink:
+                        a, b, k, seed = task
+                        first, second = (a, b) if k % 2 == 0 else (b, a)
+                        # k repeats across pairings, so the pairing is recorded to tell games apart
+                        sink.write({"game": k, "pairing": f"{a} vs {b}", "seed": seed, "agent1": first,
+                                    "agent2": second, "winner": record["winner"], "duration": round(record["duration"], 4),
+                                    "moves": record["moves"], "move_latency_ms": record["move_latency_ms"],
+                                    "search_metrics": record["search_metrics"], "length": record["length"]})
+                for pairing in self.state["pairings"].values():
+                    pairing["settled"] = is_settled(pairing, self.min_games, self.z)
+                self.save_state()
+        finally:
+            if pool:
+                pool.shutdown()
+            if sink:
+                sink.close()
+        return self.state
+
+    def standings(self):
+        """Agents sorted by rating, as (spec, rating, games, score) tuples."""
+        totals = {spec: [0, 0.0] for spec in self.specs}
+        for p in self.state["pairings"].values():
+            totals[p["a"]][0] += p["games"]
+            totals[p["a"]][1] += p["score"]
+            totals[p["b"]][0] += p["games"]
+            totals[p["b"]][1] += p["games"] - p["score"]
+        rows = [(spec, self.state["ratings"][spec], *totals[spec]) for spec in self.specs]
+        return sorted(rows, key=lambda row: row[1], reverse=True)
+
+    def display_results(self):
+        print(f"{'Agent':<32} {'Elo':>7} {'Games':>6} {'Score':>7}")
+        for spec, rating, games, score in self.standings():
+            print(f"{spec:<32} {rating:>7.1f} {games:>6} {score / max(games, 1):>7.1%}")
+        print()
+        for p in self.state["pairings"].values():
+            status = "settled early" if p["settled"] else f"{p['games']} games"
+            print(f"{p['a']} vs {p['b']}: +{p['wins']} ={p['draws']} -{p['losses']} ({status})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Round-robin Connect 4 tournament with Elo ratings.")
+    parser.add_argument("agents", nargs="+",
+                        help=f"Agent specs like minimax:depth=4 or ml:model_path=... ({', '.join(AGENT_CLASSES)})")
+    parser.add_argument("--games", type=int, default=100, help="Most games per pairing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--state", default="tournament.json", help="Progress file; an existing one is resumed")
+    parser.add_argument("--results", help="Optional .jsonl/.csv file receiving every game record")
+    parser.add_argument("--round-games", type=int, default=10, help="Games per pairing between early-stop checks")
+    parser.add_argument("--min-games", type=int, default=20, help="Games before a pairing may stop early")
+    parser.add_argument("--z", type=float, default=2.58, help="Confidence needed to stop early (2.58 is 99%%)")
+    args = parser.parse_args()
+
+    tournament = Tournament(args.agents, args.games, args.workers, args.seed, args.state, args.results,
+                            args.round_games, args.min_games, args.z)
+    tournament.run()
+    tournament.display_results()